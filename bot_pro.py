@@ -1,38 +1,187 @@
 # bot_pro.py
 import numpy as np
 import pandas as pd
-import asyncio
+import json
+import os
+import queue
+import threading
 import time
+from collections import deque
 from typing import Optional, Callable
 from sklearn.linear_model import LogisticRegression
 from sklearn.neural_network import MLPClassifier
 from sklearn.preprocessing import StandardScaler
 
 from myiq import IQOption
+from myiq.core.journal import EventJournal, TradeStats, EV_DECISION, EV_ORDER, EV_RESULT, EV_ERROR
+from myiq.core.log import get_logger
+from model_cache import ModelCache
+from inference import BatchInferenceEngine, score_rows
+
+logger = get_logger()
+
+# incrementar quando _extract_features / _history_rows mudarem (invalida o cache de modelos)
+FEATURE_VERSION = 1
+# máximo de exemplos guardados no cache de modelos
+MAX_CACHED_SAMPLES = 5000
+
+_STOP = object()
 
 class RiskManager:
-    def __init__(self, percent_risk_per_trade: float = 0.01, max_daily_loss_percent: float = 0.05):
+    def __init__(
+        self,
+        percent_risk_per_trade: float = 0.01,
+        max_daily_loss_percent: float = 0.05,
+        window_seconds: float = 3600.0,
+        max_window_loss_percent: Optional[float] = None,
+        max_drawdown_percent: Optional[float] = None,
+        max_loss_streak: Optional[int] = None,
+        max_exposure_percent: Optional[float] = None,
+        state_path: Optional[str] = None,
+        save_interval: float = 1.0,
+        clock: Optional[Callable[[], float]] = None
+    ):
         """
         percent_risk_per_trade: fração do saldo para arriscar por operação (ex: 0.01 = 1%)
         max_daily_loss_percent: se perda acumulada diária exceder isso, pausa trading
+        window_seconds / max_window_loss_percent: limite de perda na janela móvel
+        max_drawdown_percent: pausa se o saldo cair isso do pico do dia
+        max_loss_streak: pausa após N perdas seguidas (até a virada do dia)
+        max_exposure_percent: limite do valor em ordens abertas (todos os ativos)
+        state_path: arquivo JSON para persistir o estado entre reinícios
+        save_interval: intervalo mínimo (s) entre gravações do estado (thread de fundo)
+        clock: função de tempo (segundos); None = time.time. O bot passa
+               iq.get_server_time, então no simulador o risco segue o relógio virtual
+
+        Todas as métricas são atualizadas incrementalmente (O(1) por trade), então
+        vários bots podem compartilhar a mesma instância e checar risco sem rede.
         """
         self.percent_risk = percent_risk_per_trade
         self.max_daily_loss_percent = max_daily_loss_percent
-        self.starting_balance = None
+        self.window_seconds = window_seconds
+        self.max_window_loss_percent = max_window_loss_percent
+        self.max_drawdown_percent = max_drawdown_percent
+        self.max_loss_streak = max_loss_streak
+        self.max_exposure_percent = max_exposure_percent
+        self.state_path = state_path
+        self.save_interval = save_interval
+        self.clock = clock
+
+        self.starting_balance = None   # saldo no início do dia
+        self.balance = None            # último saldo conhecido (push do billing)
+        self.peak_balance = None
         self.daily_pnl = 0.0
+        self.day = self._day(self._now())
+        self.window_pnl = 0.0
+        self._window = deque()         # (ts, pnl)
+        self.loss_streak = 0
+        self.max_loss_streak_seen = 0
+        self.exposure = {}             # active_id -> valor em ordens abertas
+        self.total_exposure = 0.0
+        # pausa imposta de fora (ex: risco agregado do supervisor)
+        self.halted = False
+
+        self._queue: Optional["queue.SimpleQueue"] = None
+        self._thread: Optional[threading.Thread] = None
+        if state_path:
+            self.load()
+            # gravação fora do event loop: o loop só enfileira o último trade
+            self._queue = queue.SimpleQueue()
+            self._thread = threading.Thread(target=self._writer, args=(deque(self._window),),
+                                            name="myiq-risk", daemon=True)
+            self._thread.start()
+
+    def _now(self) -> float:
+        return self.clock() if self.clock is not None else time.time()
+
+    @staticmethod
+    def _day(ts: float) -> int:
+        return int(ts // 86400)
+
+    def _roll(self, now: float):
+        # virada de dia (UTC) zera pnl diário, sequência de perdas e rebaseia
+        # saldo inicial/pico (senão uma pausa por sequência ou drawdown nunca sai)
+        day = self._day(now)
+        if day != self.day:
+            self.day = day
+            self.daily_pnl = 0.0
+            self.loss_streak = 0
+            if self.balance is not None:
+                self.starting_balance = self.balance
+                self.peak_balance = self.balance
+        # expira entradas antigas da janela (amortizado O(1))
+        limit = now - self.window_seconds
+        while self._window and self._window[0][0] < limit:
+            _, old = self._window.popleft()
+            self.window_pnl -= old
 
     def set_starting_balance(self, balance: float):
         self.starting_balance = balance
+        self.balance = balance
+        self.peak_balance = balance
         self.daily_pnl = 0.0
 
-    def record_trade_pnl(self, pnl: float):
+    def on_balance(self, balance: float):
+        """Atualização de saldo por push (internal-billing)."""
+        self.balance = balance
+        if self.starting_balance is None:
+            self.starting_balance = balance
+        if self.peak_balance is None or balance > self.peak_balance:
+            self.peak_balance = balance
+
+    def open_position(self, active_id: int, amount: float):
+        self.exposure[active_id] = self.exposure.get(active_id, 0.0) + amount
+        self.total_exposure += amount
+
+    def close_position(self, active_id: int, amount: float):
+        left = self.exposure.get(active_id, 0.0) - amount
+        if left > 1e-9:
+            self.exposure[active_id] = left
+        else:
+            self.exposure.pop(active_id, None)
+        self.total_exposure = max(0.0, self.total_exposure - amount)
+
+    def record_trade_pnl(self, pnl: float, ts: Optional[float] = None):
+        now = self._now() if ts is None else ts
+        self._roll(now)
         self.daily_pnl += pnl
+        self._window.append((now, pnl))
+        self.window_pnl += pnl
+        if pnl < 0:
+            self.loss_streak += 1
+            self.max_loss_streak_seen = max(self.max_loss_streak_seen, self.loss_streak)
+        elif pnl > 0:
+            self.loss_streak = 0
+        if self._queue is not None:
+            self._queue.put((self._scalars(), (now, pnl)))
+
+    @property
+    def drawdown(self) -> float:
+        if not self.peak_balance or self.balance is None:
+            return 0.0
+        return max(0.0, (self.peak_balance - self.balance) / self.peak_balance)
 
     def should_pause(self) -> bool:
+        if self.halted:
+            return True
         if self.starting_balance is None:
             return False
+        self._roll(self._now())
         loss_ratio = -self.daily_pnl / self.starting_balance
-        return loss_ratio >= self.max_daily_loss_percent
+        if loss_ratio >= self.max_daily_loss_percent:
+            return True
+        if self.max_window_loss_percent is not None and -self.window_pnl / self.starting_balance >= self.max_window_loss_percent:
+            return True
+        if self.max_drawdown_percent is not None and self.drawdown >= self.max_drawdown_percent:
+            return True
+        if self.max_loss_streak is not None and self.loss_streak >= self.max_loss_streak:
+            return True
+        return False
+
+    def can_open(self, amount: float) -> bool:
+        if self.max_exposure_percent is None or not self.balance:
+            return True
+        return (self.total_exposure + amount) / self.balance <= self.max_exposure_percent
 
     def position_size(self, balance: float, price_per_unit: float = 1.0) -> float:
         """
@@ -41,6 +190,99 @@ class RiskManager:
         """
         return max(0.01, balance * self.percent_risk)
 
+    # -------------------------
+    # Persistência
+    # -------------------------
+    def _scalars(self) -> dict:
+        return {
+            "starting_balance": self.starting_balance,
+            "balance": self.balance,
+            "peak_balance": self.peak_balance,
+            "daily_pnl": self.daily_pnl,
+            "day": self.day,
+            "loss_streak": self.loss_streak,
+            "max_loss_streak_seen": self.max_loss_streak_seen
+        }
+
+    def snapshot(self) -> dict:
+        st = self._scalars()
+        st["window"] = list(self._window)
+        st["exposure"] = {str(k): v for k, v in self.exposure.items()}
+        return st
+
+    def save(self, state: Optional[dict] = None):
+        # escrita atômica: arquivo temporário + rename
+        tmp = f"{self.state_path}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                json.dump(self.snapshot() if state is None else state, f)
+            os.replace(tmp, self.state_path)
+        except Exception as e:
+            logger.error("risk_save_error", error=str(e))
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Grava o estado pendente e encerra a thread de escrita."""
+        if self._thread is None or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _writer(self, window: deque):
+        # cópia própria da janela: o loop só envia (escalares, último trade)
+        state = None
+        last_save = 0.0
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.save_interval)
+            except queue.Empty:
+                item = None
+            while item is not None:
+                if item is _STOP:
+                    stop = True
+                    break
+                state, entry = item
+                window.append(entry)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            if state is None:
+                continue
+            # várias atualizações viram uma gravação por save_interval
+            if not stop and time.monotonic() - last_save < self.save_interval:
+                continue
+            limit = window[-1][0] - self.window_seconds
+            while window and window[0][0] < limit:
+                window.popleft()
+            state["window"] = list(window)
+            self.save(state)
+            state = None
+            last_save = time.monotonic()
+
+    def load(self):
+        if not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path) as f:
+                st = json.load(f)
+        except Exception as e:
+            logger.error("risk_load_error", path=self.state_path, error=str(e))
+            return
+        self.starting_balance = st.get("starting_balance")
+        self.balance = st.get("balance")
+        self.peak_balance = st.get("peak_balance")
+        self.daily_pnl = st.get("daily_pnl", 0.0)
+        self.day = st.get("day", self.day)
+        self._window = deque((float(t), float(p)) for t, p in st.get("window", []))
+        self.window_pnl = sum(p for _, p in self._window)
+        self.loss_streak = st.get("loss_streak", 0)
+        self.max_loss_streak_seen = st.get("max_loss_streak_seen", 0)
+        # ordens abertas não sobrevivem a um reinício
+        self.exposure = {}
+        self.total_exposure = 0.0
+        self._roll(self._now())
+
 class MomentumProBot:
     def __init__(
         self,
@@ -49,7 +291,11 @@ class MomentumProBot:
         timeframe: int = 60,
         min_confidence: float = 0.72,
         vol_threshold: float = 0.0001,
-        use_mlp: bool = False
+        use_mlp: bool = False,
+        journal: Optional[EventJournal] = None,
+        risk: Optional[RiskManager] = None,
+        model_cache: Optional[ModelCache] = None,
+        inference: Optional[BatchInferenceEngine] = None
     ):
         self.iq = iq
         self.active_id = active_id
@@ -59,6 +305,10 @@ class MomentumProBot:
         self.scaler = StandardScaler()
         self.model = LogisticRegression(max_iter=500) if not use_mlp else MLPClassifier(hidden_layer_sizes=(32,16), max_iter=300)
         self.use_mlp = use_mlp
+        self.model_cache = model_cache
+        # motor de inferência em lote (compartilhado entre bots); None = predict direto
+        self.inference = inference
+        self._scoring = False
 
         # training storage
         self.X = []
@@ -75,17 +325,25 @@ class MomentumProBot:
         self.min_confidence = min_confidence
         self.vol_threshold = vol_threshold  # filtro de volatilidade (absoluto, ajuste por ativo)
 
-        # risk
-        self.risk = RiskManager(percent_risk_per_trade=0.01, max_daily_loss_percent=0.05)
+        # risk (pode ser compartilhado entre bots)
+        self.risk = risk or RiskManager(percent_risk_per_trade=0.01, max_daily_loss_percent=0.05)
+        if self.risk.clock is None:
+            # relógio do servidor (virtual no simulador)
+            self.risk.clock = iq.get_server_time
         self.balance = None
+        self._balance_push = False     # saldo atualizado por push (subscribe_balance_changes)
 
-        # metrics
+        # metrics (stats incrementais deste bot nesta sessão; o journal mantém
+        # o agregado próprio, com histórico e outros bots)
+        self.journal = journal
+        self.stats = TradeStats()
         self.trades = []
         self.trained = False
         
         # trade status control
         self.trade_in_progress = False
         self.new_candle_started = False  # Flag to indicate when a new candle begins
+        self.paused = False
 
     # -------------------------
     # Features / coleta
@@ -174,6 +432,53 @@ class MomentumProBot:
         except Exception as e:
             print("[bot] Erro treinando:", e)
 
+    def _model_family(self) -> str:
+        return "mlp" if self.use_mlp else "logreg"
+
+    def _history_rows(self, candles, start: int = 1):
+        """Gera (X, y) a partir de candles fechados, a partir do índice start."""
+        X, y = [], []
+        for i in range(start, len(candles)):
+            prev = candles[i-1]
+            cur = candles[i]
+            # impulsos: usamos primeiro movimento aproximado (cur.close - cur.open)
+            impulse = 1 if cur.close > cur.open else -1
+            impulse_strength = abs(cur.close - cur.open)
+            body = abs(prev.close - prev.open)
+            vol = abs(prev.max - prev.min)
+            X.append([1 if impulse == 1 else 0, impulse_strength, body, vol])
+            y.append(1 if cur.close > cur.open else 0)
+            self.last_candle = cur
+        return X, y
+
+    def _fine_tune(self, X, y):
+        """Atualiza o modelo carregado do cache com os exemplos do intervalo novo."""
+        self.X.extend(X)
+        self.y.extend(y)
+        Xnp = np.array(X)
+        ynp = np.array(y)
+        try:
+            if hasattr(self.model, "partial_fit"):
+                # MLP: atualização incremental de scaler e pesos
+                self.scaler.partial_fit(Xnp)
+                self.model.partial_fit(self.scaler.transform(Xnp), ynp)
+            else:
+                # LogisticRegression não tem partial_fit e o objetivo é convexo: warm_start
+                # só muda o ponto de partida, ajustar no intervalo novo descartaria o modelo.
+                # Refit nos exemplos guardados + novos, mantendo o scaler do cache
+                Xw = np.array(self.X[-MAX_CACHED_SAMPLES:])
+                yw = np.array(self.y[-MAX_CACHED_SAMPLES:])
+                if len(set(yw)) > 1:
+                    self.model.fit(self.scaler.transform(Xw), yw)
+        except Exception as e:
+            print("[bot] Erro no fine-tune:", e)
+
+    def _on_balance(self, balance):
+        if self.iq.active_balance_id is not None and balance.id != self.iq.active_balance_id:
+            return
+        self.balance = balance.amount
+        self.risk.on_balance(balance.amount)
+
     # -------------------------
     # Entrada automática
     # -------------------------
@@ -193,27 +498,30 @@ class MomentumProBot:
         if self.current_impulse == 0:
             return
 
-        feat = np.array(self._extract_features()).reshape(1, -1)
-        try:
-            feat_s = self.scaler.transform(feat)
-        except Exception:
-            feat_s = feat
-
-        # probabilidades
-        if hasattr(self.model, "predict_proba"):
-            prob = self.model.predict_proba(feat_s)[0][1]
-        else:
-            # fallback to decision_function -> convert to prob (sigmoid)
-            df = self.model.decision_function(feat_s)[0]
-            prob = 1.0 / (1.0 + np.exp(-df))
-
-        # volatilidade filter (usa última candle)
+        # volatilidade filter (usa última candle) — antes da inferência, que é a parte cara
         last_vol = abs(self.last_candle.max - self.last_candle.min) if self.last_candle else 0.0
         if last_vol < self.vol_threshold:
             # mercado lateral, ignora
             # print("[bot] Vol baixa, pulando.")
             return
 
+        # probabilidades
+        if self.inference is not None:
+            # um tick por vez aguardando o lote
+            if self._scoring:
+                return
+            self._scoring = True
+            try:
+                prob = await self.inference.predict(self.scaler, self.model, self._extract_features())
+            finally:
+                self._scoring = False
+            # estado pode ter mudado enquanto o lote era montado
+            if self.trade_in_progress or not self.new_candle_started:
+                return
+        else:
+            feat = np.array(self._extract_features()).reshape(1, -1)
+            prob = score_rows(self.scaler, self.model, feat)[0]
+
         # confiança
         if prob >= self.min_confidence:
             side = "call"
@@ -222,30 +530,29 @@ class MomentumProBot:
         else:
             return  # sem confiança suficiente
 
-        # checa risco / saldo
+        # checa risco / saldo (saldo chega por push do internal-billing)
         if self.balance is None:
-            # tenta pegar saldo
-            try:
-                bals = asyncio.get_event_loop().run_until_complete(self.iq.get_balances())
-                # pega primeira conta válida
-                b = next((bb for bb in bals if bb.amount > 0), bals[0])
-                self.balance = b.amount
-                self.risk.set_starting_balance(self.balance)
-            except Exception:
-                # se falhar, define um valor pequeno
-                self.balance = 100.0
+            return
 
-        # pausa se limite diário atingido
+        # pausa se limite de risco atingido
         if self.risk.should_pause():
-            print("[bot] Pausado: limite de perda diária atingido.")
+            # loga só na transição, não a cada tick
+            if not self.paused:
+                self.paused = True
+                logger.warning("bot_paused", active=self.active_id, reason="risk_limit")
             return
+        self.paused = False
 
         amount = self.risk.position_size(self.balance)
         amount = round(amount, 2)
         if amount < 0.01:
             return
+        if not self.risk.can_open(amount):
+            return
 
-        print(f"[bot] Entrada {side.upper()} prob={prob:.2f} amount={amount}")
+        logger.info("bot_entry", active=self.active_id, side=side, prob=round(float(prob), 2), amount=amount)
+        if self.journal is not None:
+            self.journal.record(EV_DECISION, active=self.active_id, side=side, prob=float(prob), amount=amount)
 
         # Set trade in progress flag before placing order
         self.trade_in_progress = True
@@ -254,20 +561,33 @@ class MomentumProBot:
         self.new_candle_started = False
         
         # realiza ordem
+        self.risk.open_position(self.active_id, amount)
         try:
+            if self.journal is not None:
+                self.journal.record(EV_ORDER, active=self.active_id, side=side, amount=amount, duration=30)
             res = await self.iq.buy_blitz(self.active_id, side, amount, 30)
             # res expected: dict with profit/pnl
             pnl = res.get("profit", 0) or 0
             self.risk.record_trade_pnl(pnl)
             self.trades.append({
-                "time": time.time(), "side": side, "prob": prob, "amount": amount, "pnl": pnl
+                "time": self.iq.get_server_time(), "side": side, "prob": prob, "amount": amount, "pnl": pnl
             })
-            # update balance estimate
-            self.balance = max(0.0, self.balance + pnl)
-            print(f"[bot] Trade result: {res.get('result')} pnl={pnl}")
+            self.stats.add(pnl)
+            if self.journal is not None:
+                self.journal.record(EV_RESULT, active=self.active_id, side=side, prob=float(prob),
+                                    amount=amount, result=res.get("result"), pnl=pnl)
+            # sem push do billing, estima o saldo localmente (com push, o saldo
+            # já reflete stake e payout: somar pnl contaria o trade duas vezes)
+            if not self._balance_push:
+                self.balance = max(0.0, self.balance + pnl)
+                self.risk.on_balance(self.balance)
+            logger.info("bot_trade_result", active=self.active_id, result=res.get("result"), pnl=pnl)
         except Exception as e:
-            print("[bot] Erro na ordem:", e)
+            logger.error("bot_order_error", active=self.active_id, error=str(e))
+            if self.journal is not None:
+                self.journal.record(EV_ERROR, active=self.active_id, side=side, amount=amount, error=str(e))
         finally:
+            self.risk.close_position(self.active_id, amount)
             # Reset trade in progress flag after order completion (success or failure)
             self.trade_in_progress = False
 
@@ -277,33 +597,60 @@ class MomentumProBot:
     async def start(self, initial_history: int = 1000):
         # baixa histórico para warmstart
         candles = await self.iq.get_candles(self.active_id, self.timeframe, initial_history)
-        # popula X,y com base no histórico (gera labels simples)
-        for i in range(1, len(candles)):
-            prev = candles[i-1]
-            cur = candles[i]
-            open_price = cur.open
-            # impulsos: usamos primeiro movimento aproximado (cur.close - cur.open)
-            impulse = 1 if cur.close > cur.open else -1
-            impulse_strength = abs(cur.close - cur.open)
-            body = abs(prev.close - prev.open)
-            vol = abs(prev.max - prev.min)
-            feat = [1 if impulse == 1 else 0, impulse_strength, body, vol]
-            label = 1 if cur.close > cur.open else 0
-            self.X.append(feat)
-            self.y.append(label)
-            self.last_candle = cur
-
-        if len(self.X) >= 30:
-            self._retrain()
 
-        # define saldo inicial a partir do get_balances (se possível)
+        entry = None
+        if self.model_cache is not None and candles:
+            entry = self.model_cache.load_latest(self.active_id, self.timeframe, FEATURE_VERSION,
+                                                 self._model_family(), until=candles[-1].from_time)
+        if entry is not None:
+            # warm-start: reaproveita scaler/modelo e só ajusta no intervalo novo
+            self.scaler = entry["scaler"]
+            self.model = entry["model"]
+            self.X = [list(r) for r in entry["X"]]
+            self.y = list(entry["y"])
+            self.trained = True
+            start = next((i for i, c in enumerate(candles) if c.from_time > entry["last"]), len(candles))
+            Xg, yg = self._history_rows(candles, max(1, start))
+            if Xg:
+                self._fine_tune(Xg, yg)
+            elif candles:
+                self.last_candle = candles[-1]
+            print(f"[bot] Modelo carregado do cache ({len(Xg)} exemplos novos).")
+            first = entry["first"]
+        else:
+            Xh, yh = self._history_rows(candles, 1)
+            self.X.extend(Xh)
+            self.y.extend(yh)
+            if len(self.X) >= 30:
+                self._retrain()
+            first = candles[0].from_time if candles else 0
+
+        if self.model_cache is not None and self.trained and candles:
+            try:
+                self.model_cache.save(self.active_id, self.timeframe, FEATURE_VERSION, self._model_family(),
+                                      first, candles[-1].from_time, self.scaler, self.model,
+                                      np.array(self.X[-MAX_CACHED_SAMPLES:]), np.array(self.y[-MAX_CACHED_SAMPLES:]))
+            except Exception as e:
+                print("[bot] Erro salvando cache do modelo:", e)
+
+        # define saldo inicial (se possível)
+        # (usa o cache de saldos do cliente; só vai ao servidor se estiver vazio)
         try:
-            bals = await self.iq.get_balances()
-            b = next((bb for bb in bals if bb.amount > 0), bals[0])
+            b = self.iq.get_balance()
+            if b is None:
+                bals = list(self.iq.balances.values()) or await self.iq.get_balances()
+                b = next((bb for bb in bals if bb.amount > 0), bals[0])
             self.balance = b.amount
-            self.risk.set_starting_balance(self.balance)
         except Exception:
             self.balance = 100.0
+        self.risk.on_balance(self.balance)
+
+        # saldo passa a ser atualizado por push
+        try:
+            await self.iq.subscribe_balance_changes(self._on_balance)
+            self._balance_push = True
+        except Exception as e:
+            print("[bot] Erro assinando saldo:", e)
 
         # função que será chamada a cada tick do stream
         async def tick(data):
@@ -318,13 +665,5 @@ class MomentumProBot:
 
     # utilitários
     def summary(self):
-        wins = [t for t in self.trades if t["pnl"] > 0]
-        losses = [t for t in self.trades if t["pnl"] <= 0]
-        total = sum(t["pnl"] for t in self.trades)
-        return {
-            "trades": len(self.trades),
-            "wins": len(wins),
-            "losses": len(losses),
-            "total_pnl": total,
-            "winrate": len(wins) / len(self.trades) if self.trades else 0.0
-        }
+        # O(1): contadores mantidos a cada resultado
+        return self.stats.as_dict()
@@ -3,8 +3,10 @@ from getpass import getpass
 import logging
 from datetime import datetime
 
-from bot_pro import MomentumProBot  # ou bot_ml.MomentumMLBot conforme você tenha
+from bot_pro import MomentumProBot, RiskManager  # ou bot_ml.MomentumMLBot conforme você tenha
 from myiq import IQOption
+from myiq.core.journal import EventJournal
+from model_cache import ModelCache
 
 # logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s | %(message)s', datefmt='%H:%M:%S')
@@ -13,6 +15,9 @@ logging.getLogger("websockets").setLevel(logging.WARNING)
 
 ACTIVE_ID = 76   # EUR/USD
 TIMEFRAME = 60   # 1 minuto
+JOURNAL_PATH = "trades.jsonl"
+MODEL_CACHE_DIR = "model_cache"
+RISK_STATE_PATH = "risk_state.json"   # pnl diário, sequência de perdas e drawdown entre reinícios
 
 async def main():
     print("\n=== IQ OPTION LOGIN ===")
@@ -43,7 +48,10 @@ async def main():
     print(f"➡ Usando saldo: {balance.type_name} | {balance.currency} {balance.amount}")
 
     # instanciar bot (use bot_pro.py criado antes)
-    bot = MomentumProBot(iq, ACTIVE_ID, TIMEFRAME, min_confidence=0.72, vol_threshold=0.0001, use_mlp=False)
+    journal = EventJournal(JOURNAL_PATH)
+    risk = RiskManager(percent_risk_per_trade=0.01, max_daily_loss_percent=0.05, state_path=RISK_STATE_PATH)
+    bot = MomentumProBot(iq, ACTIVE_ID, TIMEFRAME, min_confidence=0.72, vol_threshold=0.0001, use_mlp=False, journal=journal,
+                         risk=risk, model_cache=ModelCache(MODEL_CACHE_DIR))
     await bot.start(initial_history=200)
 
     print("\n🚀 BOT ATIVO! Aguardando candles...\n")
@@ -56,6 +64,8 @@ async def main():
     finally:
         # encerra conexões
         await iq.close()
+        journal.close()
+        risk.close()
         print("🔌 Conexão encerrada.")
 
 if __name__ == "__main__":
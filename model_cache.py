@@ -0,0 +1,106 @@
+# model_cache.py
+import os
+import pickle
+import time
+from typing import List, Optional, Tuple
+
+# muda quando o layout do arquivo de cache muda
+CACHE_FORMAT = 1
+
+
+class ModelCache:
+    """
+    Cache em disco de pares (scaler, modelo) treinados, versionado por
+    ativo / timeframe / versão de features / família de modelo e intervalo de dados.
+
+    Layout: <root>/<active>_<timeframe>_f<feature_version>_<family>/<first>_<last>.pkl
+    """
+
+    def __init__(self, root: str = "model_cache", keep: int = 3, max_age: Optional[float] = None):
+        """
+        keep: quantas entradas mais recentes manter por chave
+        max_age: remove entradas salvas há mais de max_age segundos (None = sem limite)
+        """
+        self.root = root
+        self.keep = keep
+        self.max_age = max_age
+
+    def _dir(self, active_id: int, timeframe: int, feature_version: int, family: str) -> str:
+        return os.path.join(self.root, f"{active_id}_{timeframe}_f{feature_version}_{family}")
+
+    def _entries(self, folder: str) -> List[Tuple[int, int, str]]:
+        # (first, last, path) ordenado do mais antigo para o mais novo
+        out = []
+        if not os.path.isdir(folder):
+            return out
+        for name in os.listdir(folder):
+            if not name.endswith(".pkl"):
+                continue
+            try:
+                first, last = name[:-4].split("_")
+                out.append((int(first), int(last), os.path.join(folder, name)))
+            except ValueError:
+                continue
+        out.sort(key=lambda e: (e[1], e[0]))
+        return out
+
+    def load_latest(self, active_id: int, timeframe: int, feature_version: int, family: str,
+                    until: Optional[int] = None) -> Optional[dict]:
+        """
+        Retorna a entrada compatível mais nova cujo fim dos dados (last) <= until.
+        A entrada é um dict com first, last, scaler, model, X, y.
+        """
+        folder = self._dir(active_id, timeframe, feature_version, family)
+        for first, last, path in reversed(self._entries(folder)):
+            if until is not None and last > until:
+                continue
+            try:
+                with open(path, "rb") as f:
+                    entry = pickle.load(f)
+            except Exception as e:
+                print("[cache] Entrada corrompida removida:", path, e)
+                self._remove(path)
+                continue
+            if entry.get("format") != CACHE_FORMAT:
+                continue
+            return entry
+        return None
+
+    def save(self, active_id: int, timeframe: int, feature_version: int, family: str,
+             first: int, last: int, scaler, model, X, y) -> str:
+        """Grava atomicamente (tmp + rename) e aplica a política de evicção."""
+        folder = self._dir(active_id, timeframe, feature_version, family)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{int(first)}_{int(last)}.pkl")
+        entry = {
+            "format": CACHE_FORMAT,
+            "saved_at": time.time(),
+            "first": int(first),
+            "last": int(last),
+            "scaler": scaler,
+            "model": model,
+            "X": X,
+            "y": y
+        }
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.evict(folder)
+        return path
+
+    def evict(self, folder: str):
+        entries = self._entries(folder)
+        stale = entries[:-self.keep] if self.keep > 0 else entries
+        if self.max_age is not None:
+            limit = time.time() - self.max_age
+            stale += [e for e in entries[-self.keep:] if os.path.getmtime(e[2]) < limit]
+        for _, _, path in stale:
+            self._remove(path)
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
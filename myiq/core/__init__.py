@@ -4,12 +4,33 @@ from .client import IQOption
 from .connection import WSConnection
 from .constants import *
 from .dispatcher import Dispatcher
+from .scheduler import CandleScheduler
+from .orders import BlitzOrderTemplate
+from .journal import EventJournal, JournalReader, TradeStats
+from .tickstore import TickRecorder, TickReader
+from .log import get_logger, configure_logging
+from .admission import AdmissionController
+from .monitor import LoopMonitor
+from .bus import MarketDataProducer, MarketDataConsumer
 from .utils import get_req_id, get_sub_id
 
 __all__ = [
     "IQOption",
     "WSConnection",
     "Dispatcher",
+    "CandleScheduler",
+    "BlitzOrderTemplate",
+    "EventJournal",
+    "JournalReader",
+    "TradeStats",
+    "TickRecorder",
+    "TickReader",
+    "get_logger",
+    "configure_logging",
+    "AdmissionController",
+    "LoopMonitor",
+    "MarketDataProducer",
+    "MarketDataConsumer",
     "get_req_id",
     "get_sub_id",
 ]
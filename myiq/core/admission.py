@@ -0,0 +1,196 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from myiq.core.constants import (
+    OP_OPEN_OPTION, OP_GET_CANDLES, OP_GET_BALANCES, OP_SUBSCRIBE_POSITIONS, OP_SUBSCRIBE
+)
+
+# lanes de prioridade (menor = mais prioritário)
+LANE_ORDERS = 0
+LANE_SUBSCRIPTIONS = 1
+LANE_HISTORY = 2
+
+OP_LANES = {
+    OP_OPEN_OPTION: LANE_ORDERS,
+    OP_SUBSCRIBE_POSITIONS: LANE_ORDERS,   # acompanha a ordem recém aberta
+    OP_SUBSCRIBE: LANE_SUBSCRIPTIONS,
+    OP_GET_BALANCES: LANE_SUBSCRIPTIONS,
+    OP_GET_CANDLES: LANE_HISTORY,
+}
+
+# (requisições/segundo, burst) por operação; "*" = limite global da conexão
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {
+    "*": (20.0, 40.0),
+    OP_OPEN_OPTION: (5.0, 5.0),
+    OP_SUBSCRIBE_POSITIONS: (5.0, 5.0),
+    OP_SUBSCRIBE: (10.0, 20.0),
+    OP_GET_BALANCES: (2.0, 4.0),
+    OP_GET_CANDLES: (5.0, 10.0),
+}
+
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "last")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+
+    def refill(self, now: float):
+        if now > self.last:
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+
+    def ready(self) -> bool:
+        return self.tokens >= 1.0
+
+    def take(self):
+        self.tokens -= 1.0
+
+    def wait_time(self) -> float:
+        return max(0.0, (1.0 - self.tokens) / self.rate)
+
+
+class _OpStats:
+    __slots__ = ("granted", "queued", "wait_total", "wait_max")
+
+    def __init__(self):
+        self.granted = 0
+        self.queued = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+
+class AdmissionController:
+    """
+    Controle de admissão do lado do cliente: token bucket por tipo de operação
+    + limite global, lanes de prioridade (ordens passam na frente de histórico)
+    e round-robin entre chaves (ex: active_id de cada bot) dentro de cada lane.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Tuple[float, float]]] = None):
+        limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        glob = limits.pop("*", None)
+        self._global = TokenBucket(*glob) if glob else None
+        self._buckets: Dict[str, TokenBucket] = {op: TokenBucket(*lim) for op, lim in limits.items()}
+        # lane -> chave -> fila de (op, future, t_enfileirado)
+        self._lanes: List["OrderedDict[Hashable, deque]"] = [OrderedDict() for _ in range(LANE_HISTORY + 1)]
+        self._depth = [0] * (LANE_HISTORY + 1)
+        self._stats: Dict[str, _OpStats] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def acquire(self, op: str, key: Hashable = None):
+        """Aguarda permissão para enviar uma requisição do tipo op."""
+        lane = OP_LANES.get(op, LANE_SUBSCRIPTIONS)
+        st = self._stats.get(op)
+        if st is None:
+            st = self._stats[op] = _OpStats()
+
+        # caminho rápido: ninguém esperando com prioridade >= e há tokens
+        if not any(self._depth[:lane + 1]) and self._try_take(op, time.monotonic()):
+            st.granted += 1
+            return
+
+        fut = asyncio.get_running_loop().create_future()
+        queued_at = time.monotonic()
+        self._lanes[lane].setdefault(key, deque()).append((op, fut))
+        self._depth[lane] += 1
+        st.queued += 1
+        self._schedule(0.0)
+        try:
+            await fut
+        finally:
+            if not fut.done():
+                fut.cancel()
+        waited = time.monotonic() - queued_at
+        st.granted += 1
+        st.wait_total += waited
+        if waited > st.wait_max:
+            st.wait_max = waited
+
+    def _try_take(self, op: str, now: float) -> bool:
+        bucket = self._buckets.get(op)
+        g = self._global
+        if g is not None:
+            g.refill(now)
+            if not g.ready():
+                return False
+        if bucket is not None:
+            bucket.refill(now)
+            if not bucket.ready():
+                return False
+            bucket.take()
+        if g is not None:
+            g.take()
+        return True
+
+    def _schedule(self, delay: float):
+        if self._timer is not None:
+            return
+        self._timer = asyncio.get_running_loop().call_later(delay, self._pump)
+
+    def _pump(self):
+        self._timer = None
+        now = time.monotonic()
+        next_wait = None
+        for lane, queues in enumerate(self._lanes):
+            blocked_global = False
+            # uma passada round-robin por chave; repete enquanto algo for liberado
+            progress = True
+            while progress and queues:
+                progress = False
+                for key in list(queues.keys()):
+                    q = queues[key]
+                    # descarta esperas canceladas
+                    while q and q[0][1].done():
+                        q.popleft()
+                        self._depth[lane] -= 1
+                    if not q:
+                        del queues[key]
+                        continue
+                    op, fut = q[0]
+                    if self._try_take(op, now):
+                        q.popleft()
+                        self._depth[lane] -= 1
+                        fut.set_result(None)
+                        # chave atendida vai para o fim (justiça entre bots)
+                        queues.move_to_end(key)
+                        if not q:
+                            del queues[key]
+                        progress = True
+                        continue
+                    if self._global is not None and not self._global.ready():
+                        blocked_global = True
+                        wait = self._global.wait_time()
+                    else:
+                        wait = self._buckets[op].wait_time()
+                    next_wait = wait if next_wait is None else min(next_wait, wait)
+                    if blocked_global:
+                        break
+                if blocked_global:
+                    break
+            # lane mais prioritária esperando o limite global: lanes abaixo não consomem
+            if blocked_global:
+                break
+        if any(self._depth):
+            self._schedule(next_wait if next_wait is not None else 0.001)
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": {"orders": self._depth[LANE_ORDERS],
+                            "subscriptions": self._depth[LANE_SUBSCRIPTIONS],
+                            "history": self._depth[LANE_HISTORY]},
+            "ops": {
+                op: {
+                    "granted": s.granted,
+                    "queued": s.queued,
+                    "avg_wait": s.wait_total / s.queued if s.queued else 0.0,
+                    "max_wait": s.wait_max
+                }
+                for op, s in self._stats.items()
+            }
+        }
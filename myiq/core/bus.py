@@ -0,0 +1,294 @@
+import asyncio
+import inspect
+import os
+import struct
+from multiprocessing import shared_memory
+from typing import Callable, Dict, List, Optional, Tuple
+
+from myiq.core.constants import EV_CANDLE_GENERATED
+from myiq.core.tickstore import RECORD, _tick_at_ns
+from myiq.core.log import get_logger
+
+logger = get_logger()
+
+DEFAULT_BUS_NAME = "myiq_md"
+_MAGIC = 0x4D59_4951          # "MYIQ"
+_VERSION = 2
+
+# cabeçalho: magic, versão, capacidade, último seq publicado, pid do produtor, slots da tabela latest
+HEADER = struct.Struct("<IIQQQQ")
+HEADER_SIZE = 64
+# slot: seq, active_id, size + registro do tick (mesmo layout do tickstore)
+SLOT = struct.Struct("<Qqq" + RECORD.format.lstrip("<"))
+_SEQ = struct.Struct("<Q")
+_WRITE_SEQ_OFFSET = 16
+_READ_RETRIES = 1000
+
+
+def _key_slot(active_id: int, size: int, slots: int) -> int:
+    # hash estável entre processos (hash() de Python não é)
+    return (active_id * 1_000_003 + size) % slots
+
+
+def _pid_alive(pid: int) -> bool:
+    if not pid:
+        return False
+    if os.name == "nt":
+        # no Windows o segmento some com o último handle: se existe, há dono vivo
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # consumidores não devem remover o segmento ao sair (resource_tracker)
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+def _tick(row: tuple) -> dict:
+    _, active_id, size, at, frm, o, c, lo, hi, vol = row
+    return {"active_id": active_id, "size": size, "at": at, "from": frm, "to": frm + size,
+            "open": o, "close": c, "min": lo, "max": hi, "volume": vol}
+
+
+class MarketDataProducer:
+    """
+    Publica ticks do candle-generated num ring buffer em memória compartilhada.
+    Um único produtor; cada slot carrega um número de sequência (seqlock)
+    para os consumidores validarem a leitura sem locks.
+    Além do ring, mantém no segmento uma tabela com o último tick por
+    (active_id, size), para consumidores recém conectados.
+    """
+
+    def __init__(self, name: str = DEFAULT_BUS_NAME, capacity: int = 65536,
+                 latest_slots: int = 1024, replace: bool = False):
+        """
+        latest_slots: capacidade da tabela de último tick (nº máximo de pares ativo/timeframe)
+        replace: sobrescreve um bus existente mesmo com produtor vivo
+        """
+        self.name = name
+        self.capacity = capacity
+        self.latest_slots = latest_slots
+        self._latest_offset = HEADER_SIZE + capacity * SLOT.size
+        size = self._latest_offset + latest_slots * SLOT.size
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            self._reclaim(name, replace)
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._buf = self.shm.buf
+        HEADER.pack_into(self._buf, 0, _MAGIC, _VERSION, capacity, 0, os.getpid(), latest_slots)
+        self.seq = 0
+        self._latest_index: Dict[Tuple[int, int], int] = {}
+        self._latest_used = set()
+
+    @staticmethod
+    def _reclaim(name: str, replace: bool):
+        old = _attach(name)
+        try:
+            magic, version, _, _, pid, _ = HEADER.unpack_from(old.buf, 0) if old.size >= HEADER.size else (0,) * 6
+            if not replace:
+                if magic != _MAGIC or version != _VERSION:
+                    raise FileExistsError(f"Segmento {name} existe e nao e um bus myiq v{_VERSION} (use replace=True)")
+                if _pid_alive(pid):
+                    raise FileExistsError(f"Bus {name} em uso pelo processo {pid} (use replace=True)")
+            # segmento órfão de uma execução anterior (ou replace explícito)
+            logger.warning("bus_segment_replaced", bus=name, previous_pid=pid)
+        finally:
+            old.close()
+        try:
+            old.unlink()
+        except FileNotFoundError:
+            pass
+
+    def attach(self, dispatcher):
+        """Registra o produtor como listener do candle-generated no Dispatcher."""
+        dispatcher.add_listener(EV_CANDLE_GENERATED, self.on_message)
+
+    def detach(self, dispatcher):
+        dispatcher.remove_listener(EV_CANDLE_GENERATED, self.on_message)
+
+    def on_message(self, msg: dict):
+        data = msg.get("msg")
+        if data:
+            self.publish(data)
+
+    def publish(self, data: dict):
+        seq = self.seq + 1
+        off = HEADER_SIZE + ((seq - 1) % self.capacity) * SLOT.size
+        buf = self._buf
+        key = (int(data.get("active_id", 0)), int(data.get("size", 0)))
+        values = (
+            key[0], key[1],
+            _tick_at_ns(data), int(data.get("from", 0)),
+            float(data.get("open", 0)), float(data.get("close", 0)),
+            float(data.get("min", 0)), float(data.get("max", 0)),
+            float(data.get("volume", 0) or 0)
+        )
+        # seq=0 marca o slot como "em escrita"
+        _SEQ.pack_into(buf, off, 0)
+        SLOT.pack_into(buf, off, 0, *values)
+        _SEQ.pack_into(buf, off, seq)
+        _SEQ.pack_into(buf, _WRITE_SEQ_OFFSET, seq)
+        self.seq = seq
+
+        # tabela de último tick por par (mesmo seqlock)
+        slot = self._latest_index.get(key)
+        if slot is None:
+            slot = self._claim(key)
+            if slot is None:
+                return
+        # copia o corpo do slot do ring (pack_into zeraria o destino antes de escrever
+        # e um leitor veria a chave zerada, que marca slot vazio)
+        dst = self._latest_offset + slot * SLOT.size
+        _SEQ.pack_into(buf, dst, 0)
+        buf[dst + 8:dst + SLOT.size] = buf[off + 8:off + SLOT.size]
+        _SEQ.pack_into(buf, dst, seq)
+
+    def _claim(self, key: Tuple[int, int]) -> Optional[int]:
+        # endereçamento aberto (sondagem linear); slot de uma chave nunca muda
+        n = self.latest_slots
+        start = _key_slot(key[0], key[1], n)
+        for i in range(n):
+            slot = (start + i) % n
+            if slot not in self._latest_used:
+                self._latest_used.add(slot)
+                self._latest_index[key] = slot
+                return slot
+        logger.warning("bus_latest_table_full", bus=self.name, active=key[0], size=key[1])
+        return None
+
+    def close(self, unlink: bool = True):
+        self._buf = None
+        self.shm.close()
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class MarketDataConsumer:
+    """
+    Lê o ring buffer sem locks e sem copiar o segmento. Consumidor lento
+    (ultrapassado pelo produtor) é detectado e avança para o dado mais antigo
+    ainda disponível; o total perdido fica em `overruns`.
+    """
+
+    def __init__(self, name: str = DEFAULT_BUS_NAME, replay: bool = False):
+        """replay: começa pelo tick mais antigo ainda no ring (senão, só os novos)."""
+        self.name = name
+        self.shm = _attach(name)
+        self._buf = self.shm.buf
+        magic, version, capacity, head, _, latest_slots = HEADER.unpack_from(self._buf, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"Segmento {name} nao e um bus myiq v{_VERSION}")
+        self.capacity = capacity
+        self.latest_slots = latest_slots
+        self._latest_offset = HEADER_SIZE + capacity * SLOT.size
+        self.next = max(1, head - capacity + 1) if replay else head + 1
+        self.overruns = 0
+        self._latest_index: Dict[Tuple[int, int], int] = {}
+
+    def lag(self) -> int:
+        """Quantos ticks publicados ainda não foram lidos."""
+        return _SEQ.unpack_from(self._buf, _WRITE_SEQ_OFFSET)[0] - self.next + 1
+
+    def latest(self, active_id: int, size: int) -> Optional[dict]:
+        """Último tick publicado do par, lido da tabela compartilhada (inclui ticks anteriores à conexão)."""
+        key = (int(active_id), int(size))
+        slot = self._latest_index.get(key)
+        if slot is not None:
+            return self._read_latest(slot, key)
+        n = self.latest_slots
+        start = _key_slot(key[0], key[1], n)
+        for i in range(n):
+            slot = (start + i) % n
+            row = self._read_slot(self._latest_offset + slot * SLOT.size)
+            if row is None:
+                return None
+            if row[1] == key[0] and row[2] == key[1] and row[0]:
+                self._latest_index[key] = slot
+                return _tick(row)
+            if row[0] == 0 and row[1] == 0 and row[2] == 0:
+                # slot vazio: par nunca publicado
+                return None
+        return None
+
+    def _read_latest(self, slot: int, key: Tuple[int, int]) -> Optional[dict]:
+        row = self._read_slot(self._latest_offset + slot * SLOT.size)
+        if row is None or (row[1], row[2]) != key:
+            return None
+        return _tick(row)
+
+    def _read_slot(self, off: int) -> Optional[tuple]:
+        buf = self._buf
+        for _ in range(_READ_RETRIES):
+            row = SLOT.unpack_from(buf, off)
+            seq = row[0]
+            if seq and _SEQ.unpack_from(buf, off)[0] == seq:
+                return row
+            if not seq and row[1] == 0 and row[2] == 0:
+                return row
+            # produtor escrevendo o slot: tenta de novo
+        return None
+
+    def poll(self, max_items: Optional[int] = None) -> List[dict]:
+        """Retorna os ticks publicados desde a última chamada (formato candle-generated)."""
+        buf = self._buf
+        head = _SEQ.unpack_from(buf, _WRITE_SEQ_OFFSET)[0]
+        if head < self.next:
+            return []
+        oldest = head - self.capacity + 1
+        if self.next < oldest:
+            # consumidor lento: produtor já sobrescreveu esses slots
+            self.overruns += oldest - self.next
+            logger.warning("bus_consumer_overrun", bus=self.name, lost=oldest - self.next)
+            self.next = oldest
+        end = head if max_items is None else min(head, self.next + max_items - 1)
+        out = []
+        unpack = SLOT.unpack_from
+        slot_size = SLOT.size
+        cap = self.capacity
+        for seq in range(self.next, end + 1):
+            off = HEADER_SIZE + ((seq - 1) % cap) * slot_size
+            row = unpack(buf, off)
+            # valida: o slot ainda é o seq esperado depois da leitura
+            if row[0] != seq or _SEQ.unpack_from(buf, off)[0] != seq:
+                self.overruns += 1
+                continue
+            out.append(_tick(row))
+        self.next = end + 1
+        return out
+
+    async def listen(self, callback: Callable[[dict], None], poll_interval: float = 0.001):
+        """Entrega cada tick a callback (sync ou async) até a task ser cancelada."""
+        is_async = inspect.iscoroutinefunction(callback)
+        while True:
+            ticks = self.poll()
+            for tick in ticks:
+                if is_async:
+                    await callback(tick)
+                else:
+                    callback(tick)
+            if not ticks:
+                await asyncio.sleep(poll_interval)
+
+    def close(self):
+        self._buf = None
+        self.shm.close()
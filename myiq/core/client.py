@@ -1,25 +1,42 @@
 import asyncio
 import time
-import structlog
-from typing import List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Tuple
 from myiq.http.auth import IQAuth
 from myiq.core.connection import WSConnection
 from myiq.core.dispatcher import Dispatcher
+from myiq.core.scheduler import CandleScheduler, ScheduledCall
+from myiq.core.orders import BlitzOrderTemplate
+from myiq.core.admission import AdmissionController
+from myiq.core.monitor import LoopMonitor
 from myiq.core.utils import get_req_id, get_sub_id
 from myiq.core.constants import *
 from myiq.models.base import WsRequest, WsMessageBody, Balance, Candle
+from myiq.core.log import get_logger
 
-logger = structlog.get_logger()
+logger = get_logger()
 
 class IQOption:
-    def __init__(self, email: str, password: str):
+    def __init__(self, email: str, password: str, admission: Optional[AdmissionController] = None,
+                 threaded_io: bool = False):
         self.auth = IQAuth(email, password)
         self.dispatcher = Dispatcher()
-        self.ws = WSConnection(self.dispatcher)
+        # threaded_io: leitura/decodificação do WS numa thread, entregue ao loop em lotes
+        self.ws = WSConnection(self.dispatcher, threaded=threaded_io)
         self.ssid: Optional[str] = None
         self.active_balance_id: Optional[int] = None
         self.server_time_offset = 0.0
         self.connected = False
+        # timers alinhados às fronteiras de candle (relógio do servidor)
+        self.scheduler = CandleScheduler(self.get_server_time)
+        # frames de ordem pré-serializados por (saldo, ativo, duração)
+        self._order_templates: Dict[Tuple[int, int, int], BlitzOrderTemplate] = {}
+        # cache de saldos por id, mantido por push do internal-billing
+        self.balances: Dict[int, Balance] = {}
+        self._balance_callbacks: List[Callable[[Balance], None]] = []
+        self._balance_stream = False
+        # limites de taxa por operação / prioridade (ordens antes de histórico)
+        self.admission = admission or AdmissionController()
+        self.monitor: Optional[LoopMonitor] = None
 
         # hook para mensagens gerais (opcional)
         self.ws.on_message_hook = self._on_ws_message
@@ -35,7 +52,13 @@ class IQOption:
             await self._authenticate()
             # subscreve portfolio
             await self.subscribe_portfolio()
+            # saldos: stream de alterações + carga inicial do cache
+            await self._start_balance_stream()
             self.connected = True
+            try:
+                await asyncio.wait_for(self.get_balances(), timeout=8.0)
+            except Exception as e:
+                logger.error("balance_refresh_error", error=str(e))
         except Exception as e:
             logger.error("start_error", error=str(e))
             self.connected = False
@@ -59,6 +82,20 @@ class IQOption:
         # retorna timestamp em segundos (inteiro)
         return int((time.time() * 1000 + self.server_time_offset) / 1000)
 
+    def get_server_time(self) -> float:
+        # retorna timestamp em segundos com fração (precisão de ms)
+        return (time.time() * 1000 + self.server_time_offset) / 1000
+
+    # --- AGENDAMENTO POR CANDLE ---
+    def schedule_at_candle(self, duration: int, offset: float, callback: Callable, repeat: bool = False) -> ScheduledCall:
+        """
+        Agenda callback (sync ou async) na próxima fronteira de candle + offset (segundos).
+        offset=2 -> abertura + 2s; offset=-0.5 -> 500ms antes do fechamento.
+        """
+        if repeat:
+            return self.scheduler.every_candle(duration, offset, callback)
+        return self.scheduler.call_at_candle(duration, offset, callback)
+
     async def _authenticate(self):
         req_id = get_req_id()
         future = self.dispatcher.create_future(req_id)
@@ -78,12 +115,14 @@ class IQOption:
     async def subscribe_portfolio(self):
         req_ids = [get_sub_id(), get_sub_id()]
         # order-changed
+        await self.admission.acquire(OP_SUBSCRIBE)
         await self.ws.send({
             "name": "subscribeMessage",
             "request_id": req_ids[0],
             "msg": {"name": "portfolio.order-changed", "version": "2.0", "params": {"routingFilters": {"instrument_type": INSTRUMENT_TYPE_BLITZ}}}
         })
         # position-changed
+        await self.admission.acquire(OP_SUBSCRIBE)
         await self.ws.send({
             "name": "subscribeMessage",
             "request_id": req_ids[1],
@@ -92,6 +131,7 @@ class IQOption:
         logger.info("portfolio_subscribed")
 
     async def get_balances(self) -> List[Balance]:
+        """Busca os saldos no servidor e atualiza o cache (refresh manual)."""
         req_id = get_req_id()
         future = self.dispatcher.create_future(req_id)
         payload = WsRequest(
@@ -99,6 +139,7 @@ class IQOption:
             request_id=req_id,
             msg=WsMessageBody(name=OP_GET_BALANCES, version="1.0", body={"types_ids": [1, 4, 2, 6]})
         )
+        await self.admission.acquire(OP_GET_BALANCES)
         await self.ws.send(payload.model_dump())
         res = await future
         # res可能 contém msg -> lista de balances
@@ -109,8 +150,54 @@ class IQOption:
                 balances.append(Balance(**b))
             except Exception as e:
                 logger.error("balance_parse_error", error=str(e), raw=b)
+        for b in balances:
+            self.balances[b.id] = b
         return balances
 
+    def get_balance(self, balance_id: Optional[int] = None) -> Optional[Balance]:
+        """Leitura síncrona do cache; sem balance_id usa o saldo ativo."""
+        if balance_id is None:
+            balance_id = self.active_balance_id
+        if balance_id is None:
+            return None
+        return self.balances.get(int(balance_id))
+
+    async def subscribe_balance_changes(self, callback: Callable[[Balance], None]):
+        """Recebe por push (internal-billing) cada alteração de saldo como Balance."""
+        self._balance_callbacks.append(callback)
+        await self._start_balance_stream()
+
+    async def _start_balance_stream(self):
+        if self._balance_stream:
+            return
+        await self.admission.acquire(OP_SUBSCRIBE)
+        await self.ws.send({
+            "name": "subscribeMessage",
+            "request_id": get_sub_id(),
+            "msg": {"name": OP_SUBSCRIBE_BALANCE_CHANGED, "version": "1.0"}
+        })
+        self.dispatcher.add_listener(EV_BALANCE_CHANGED, self._on_balance_changed)
+        self._balance_stream = True
+        logger.info("balance_stream_started")
+
+    def _on_balance_changed(self, msg: dict):
+        raw = msg.get("msg", {}).get("current_balance", {})
+        try:
+            balance = Balance(**raw)
+        except Exception as e:
+            # atualização parcial: aplica só o amount sobre o que já está em cache
+            cached = self.balances.get(raw.get("id"))
+            if cached is None or "amount" not in raw:
+                logger.error("balance_parse_error", error=str(e), raw=raw)
+                return
+            balance = cached.model_copy(update={"amount": float(raw["amount"])})
+        self.balances[balance.id] = balance
+        for cb in list(self._balance_callbacks):
+            try:
+                cb(balance)
+            except Exception as e:
+                logger.error("balance_callback_error", error=str(e))
+
     async def change_balance(self, balance_id: int):
         self.active_balance_id = int(balance_id)
         logger.info("balance_selected", id=balance_id)
@@ -130,16 +217,24 @@ class IQOption:
                 }
             }
         }
+        await self.admission.acquire(OP_SUBSCRIBE, active_id)
         await self.ws.send(msg)
+        stream_name = f"{EV_CANDLE_GENERATED}:{active_id}:{duration}"
 
         def on_candle(msg):
             if msg.get("name") == EV_CANDLE_GENERATED:
                 data = msg.get("msg", {})
                 if str(data.get("active_id")) == str(active_id) and str(data.get("size")) == str(duration):
+                    monitor = self.monitor
                     if asyncio.iscoroutinefunction(callback):
-                        asyncio.create_task(callback(data))
-                    else:
+                        if monitor is None:
+                            asyncio.create_task(callback(data))
+                        else:
+                            monitor.task(stream_name, callback(data))
+                    elif monitor is None:
                         callback(data)
+                    else:
+                        monitor.call(stream_name, callback, data)
 
         self.dispatcher.add_listener(EV_CANDLE_GENERATED, on_candle)
         logger.info("stream_started", active=active_id)
@@ -151,6 +246,7 @@ class IQOption:
             to_time = self.get_server_timestamp()
         body = {"active_id": active_id, "size": duration, "to": to_time, "count": count}
         payload = WsRequest(name="sendMessage", request_id=req_id, msg=WsMessageBody(name=OP_GET_CANDLES, version="2.0", body=body))
+        await self.admission.acquire(OP_GET_CANDLES, active_id)
         await self.ws.send(payload.model_dump())
         res = await future
         candles = []
@@ -162,27 +258,31 @@ class IQOption:
         return candles
 
     # --- BLITZ TRADING ---
-    async def buy_blitz(self, active_id: int, direction: str, amount: float, duration: int = 30) -> dict:
-        if not self.active_balance_id:
+    def prepare_blitz(self, active_id: int, duration: int = 30, balance_id: Optional[int] = None) -> BlitzOrderTemplate:
+        """Pré-monta (e guarda em cache) o frame de ordem para saldo/ativo/duração."""
+        balance_id = balance_id or self.active_balance_id
+        if not balance_id:
             raise ValueError("Saldo necessario")
-        req_id = get_req_id()
-        server_time = self.get_server_timestamp()
-        expired = server_time + duration
-
-        body = {
-            "user_balance_id": self.active_balance_id,
-            "active_id": active_id,
-            "option_type_id": OPTION_TYPE_BLITZ,
-            "direction": direction.lower(),
-            "expired": expired,
-            "expiration_size": duration,
-            "refund_value": 0,
-            "price": float(amount),
-            "value": 0,
-            "profit_percent": 85
-        }
+        key = (int(balance_id), int(active_id), int(duration))
+        order = self._order_templates.get(key)
+        if order is None:
+            order = BlitzOrderTemplate(*key)
+            self._order_templates[key] = order
+        return order
 
-        payload = WsRequest(name="sendMessage", request_id=req_id, msg=WsMessageBody(name=OP_OPEN_OPTION, version="2.0", body=body))
+    async def buy_blitz(self, active_id: int, direction: str, amount: float, duration: int = 30) -> dict:
+        order = self.prepare_blitz(active_id, duration)
+        return await self.submit_blitz(order, direction, amount)
+
+    async def submit_blitz(self, order: BlitzOrderTemplate, direction: str, amount: float) -> dict:
+        """Envia ordem a partir de um template preparado e espera o resultado."""
+        active_id = order.active_id
+        duration = order.duration
+        # espera a vez antes de calcular a expiração
+        await self.admission.acquire(OP_OPEN_OPTION, active_id)
+        req_id = get_req_id()
+        expired = self.get_server_timestamp() + duration
+        frame = order.render(req_id, direction, amount, expired)
 
         uuid_future = asyncio.get_running_loop().create_future()
 
@@ -196,13 +296,14 @@ class IQOption:
                             uuid_future.set_result(raw.get("id"))
 
         self.dispatcher.add_listener(EV_POSITION_CHANGED, on_open)
+        await self.ws.send_raw(frame)
         logger.info("sending_order", active=active_id)
-        await self.ws.send(payload.model_dump())
 
         try:
             order_uuid = await asyncio.wait_for(uuid_future, timeout=8.0)
             self.dispatcher.remove_listener(EV_POSITION_CHANGED, on_open)
 
+            await self.admission.acquire(OP_SUBSCRIBE_POSITIONS, active_id)
             await self.ws.send({
                 "name": "sendMessage",
                 "request_id": get_req_id(),
@@ -245,8 +346,26 @@ class IQOption:
             self.dispatcher.remove_listener(EV_POSITION_CHANGED, on_open)
             return {"status": "error", "result": "timeout", "pnl": 0}
 
+    def start_monitor(self, interval: float = 0.1, slow_threshold: float = 0.05) -> LoopMonitor:
+        """Liga o monitor de lag do loop e de tempo por listener/callback."""
+        if self.monitor is None:
+            self.monitor = LoopMonitor(interval=interval, slow_threshold=slow_threshold)
+            self.dispatcher.monitor = self.monitor
+            self.monitor.start()
+        return self.monitor
+
+    def stats(self) -> dict:
+        """Métricas internas do cliente (filas de admissão, tempos de espera, saúde do loop)."""
+        out = {"admission": self.admission.stats()}
+        if self.monitor is not None:
+            out["loop"] = self.monitor.stats()
+        return out
+
     async def close(self):
         """Fecha corretamente o websocket e marca desconexão."""
+        self.scheduler.cancel_all()
+        if self.monitor is not None:
+            self.monitor.stop()
         try:
             await self.ws.close()
         except Exception as e:
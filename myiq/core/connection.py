@@ -1,13 +1,30 @@
 import json
+import re
 import asyncio
+import threading
 import websockets
-import structlog
-from myiq.core.constants import IQ_WS_URL
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from myiq.core.constants import IQ_WS_URL, EV_TIME_SYNC
+from myiq.core.log import get_logger
+
+logger = get_logger()
+
+# pré-filtro barato (sem decodificar o JSON) usado no modo threaded
+_NAME_RE = re.compile(r'"name"\s*:\s*"([^"]*)"')
+_REQ_ID_RE = re.compile(r'"request_id"\s*:\s*"?([^",}]+)')
+# eventos sempre decodificados (usados pelo on_message_hook do cliente)
+_ALWAYS = frozenset({EV_TIME_SYNC})
 
-logger = structlog.get_logger()
 
 class WSConnection:
-    def __init__(self, dispatcher):
+    def __init__(self, dispatcher, threaded: bool = False, batch_size: int = 256, filter_events: bool = True):
+        """
+        threaded: leitura do socket e json.loads numa thread dedicada; as mensagens
+            chegam ao loop em lotes (um call_soon_threadsafe por lote). Requer websockets>=12.
+        filter_events: no modo threaded, descarta antes de decodificar frames de eventos
+            sem listener no Dispatcher (respostas com request_id sempre passam).
+        """
         self.url = IQ_WS_URL
         self.dispatcher = dispatcher
         self.ws: websockets.WebSocketClientProtocol | None = None
@@ -15,8 +32,29 @@ class WSConnection:
         self.on_message_hook = None
         self._recv_task: asyncio.Task | None = None
 
+        self.threaded = threaded
+        self.batch_size = batch_size
+        self.filter_events = filter_events
+        self._sync_ws = None
+        self._sync_connect = None
+        self._reader: Optional[threading.Thread] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._aio_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.frames_dropped = 0
+        if threaded:
+            try:
+                from websockets.sync.client import connect as sync_connect
+            except ImportError as e:
+                raise RuntimeError(
+                    "WSConnection(threaded=True) requer websockets>=12 (pip install -U \"websockets>=12\")"
+                ) from e
+            self._sync_connect = sync_connect
+
     async def connect(self):
         # connect e inicia loop de recepção
+        if self.threaded:
+            await self._connect_threaded()
+            return
         self.ws = await websockets.connect(self.url)
         self.is_connected = True
         self._recv_task = asyncio.create_task(self._loop())
@@ -30,12 +68,7 @@ class WSConnection:
                 except Exception:
                     # ignore non-json messages
                     continue
-                if self.on_message_hook:
-                    try:
-                        self.on_message_hook(data)
-                    except Exception as e:
-                        logger.error("on_message_hook_error", error=str(e))
-                self.dispatcher.dispatch(data)
+                self._handle(data)
         except asyncio.CancelledError:
             # task was cancelled—closing gracefully
             pass
@@ -44,10 +77,106 @@ class WSConnection:
         finally:
             self.is_connected = False
 
-    async def send(self, data: dict):
-        if not self.is_connected or not self.ws:
+    def _handle(self, data: dict):
+        if self.on_message_hook:
+            try:
+                self.on_message_hook(data)
+            except Exception as e:
+                logger.error("on_message_hook_error", error=str(e))
+        self.dispatcher.dispatch(data)
+
+    # -------------------------
+    # modo threaded
+    # -------------------------
+    async def _connect_threaded(self):
+        self._aio_loop = asyncio.get_running_loop()
+        # handshake bloqueante fora do loop
+        self._sync_ws = await self._aio_loop.run_in_executor(None, self._sync_connect, self.url)
+        # uma única thread de escrita: send bloqueia sob backpressure e a ordem dos frames é mantida
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="myiq-ws-writer")
+        self.is_connected = True
+        self._reader = threading.Thread(target=self._reader_thread, name="myiq-ws-reader", daemon=True)
+        self._reader.start()
+        logger.info("websocket_connected", mode="threaded")
+
+    def _wanted(self, raw) -> bool:
+        if not self.filter_events:
+            return True
+        if isinstance(raw, bytes):
+            raw = raw.decode("utf-8", "ignore")
+        m = _NAME_RE.search(raw)
+        if m is None:
+            return True
+        name = m.group(1)
+        if name in _ALWAYS or name in self.dispatcher.event_names:
+            return True
+        # respostas de requisições (futures) sempre passam
+        r = _REQ_ID_RE.search(raw)
+        return r is not None and r.group(1) != ""
+
+    def _decode_into(self, raw, batch: List[dict]):
+        if not self._wanted(raw):
+            self.frames_dropped += 1
+            return
+        try:
+            batch.append(json.loads(raw))
+        except Exception:
+            # ignore non-json messages
+            pass
+
+    def _reader_thread(self):
+        ws = self._sync_ws
+        loop = self._aio_loop
+        try:
+            while True:
+                batch: List[dict] = []
+                self._decode_into(ws.recv(), batch)
+                # drena o que já está no buffer sem bloquear
+                frames = 1
+                while frames < self.batch_size:
+                    try:
+                        raw = ws.recv(timeout=0)
+                    except TimeoutError:
+                        break
+                    self._decode_into(raw, batch)
+                    frames += 1
+                if batch:
+                    loop.call_soon_threadsafe(self._deliver, batch)
+        except Exception as e:
+            if self.is_connected:
+                logger.error("ws_error", error=str(e))
+        finally:
+            try:
+                loop.call_soon_threadsafe(self._mark_closed)
+            except RuntimeError:
+                # loop já fechado
+                self.is_connected = False
+
+    def _deliver(self, batch: List[dict]):
+        for data in batch:
+            self._handle(data)
+
+    def _mark_closed(self):
+        self.is_connected = False
+
+    # -------------------------
+    # envio
+    # -------------------------
+    async def _send_text(self, text: str):
+        if not self.is_connected or not (self.ws or self._sync_ws):
             raise ConnectionError("WS desconectado")
-        await self.ws.send(json.dumps(data))
+        if self._sync_ws is not None:
+            # send do cliente sync pode bloquear (buffer cheio): roda na thread de escrita
+            await asyncio.get_running_loop().run_in_executor(self._writer, self._sync_ws.send, text)
+        else:
+            await self.ws.send(text)
+
+    async def send(self, data: dict):
+        await self._send_text(json.dumps(data))
+
+    async def send_raw(self, text: str):
+        # envia frame já serializado (ex: templates de ordem)
+        await self._send_text(text)
 
     async def close(self):
         try:
@@ -59,6 +188,14 @@ class WSConnection:
                     pass
             if self.ws:
                 await self.ws.close()
+            if self._sync_ws is not None:
+                self.is_connected = False
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self._sync_ws.close)
+                if self._reader is not None:
+                    await loop.run_in_executor(None, self._reader.join, 5.0)
+                if self._writer is not None:
+                    self._writer.shutdown(wait=False)
         except Exception as e:
             logger.error("ws_close_error", error=str(e))
         finally:
@@ -7,12 +7,15 @@ OP_GET_BALANCES = "internal-billing.get-balances"
 OP_OPEN_OPTION = "binary-options.open-option"
 OP_SUBSCRIBE_POSITIONS = "subscribe-positions"
 OP_GET_CANDLES = "get-candles"
+OP_SUBSCRIBE = "subscribeMessage"
+OP_SUBSCRIBE_BALANCE_CHANGED = "internal-billing.balance-changed"
 
 # Eventos
 EV_AUTHENTICATED = "authenticated"
 EV_TIME_SYNC = "timeSync"
 EV_POSITION_CHANGED = "position-changed"
 EV_CANDLE_GENERATED = "candle-generated"
+EV_BALANCE_CHANGED = "balance-changed"
 
 # Blitz Config
 OPTION_TYPE_BLITZ = 12
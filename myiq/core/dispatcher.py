@@ -1,13 +1,17 @@
 import asyncio
-import structlog
 from typing import Dict, List, Callable
+from myiq.core.log import get_logger
 
-logger = structlog.get_logger()
+logger = get_logger()
 
 class Dispatcher:
     def __init__(self):
         self._futures: Dict[str, asyncio.Future] = {}
         self._listeners: Dict[str, List[Callable]] = {}
+        # LoopMonitor opcional: cronometra cada listener por nome de evento
+        self.monitor = None
+        # nomes de eventos com listeners (snapshot imutável, lido pela thread de I/O)
+        self.event_names: frozenset = frozenset()
 
     def create_future(self, request_id: str) -> asyncio.Future:
         loop = asyncio.get_running_loop()
@@ -19,11 +23,16 @@ class Dispatcher:
         if event_name not in self._listeners:
             self._listeners[event_name] = []
         self._listeners[event_name].append(callback)
+        self._refresh_names()
 
     def remove_listener(self, event_name: str, callback: Callable):
         if event_name in self._listeners:
             if callback in self._listeners[event_name]:
                 self._listeners[event_name].remove(callback)
+                self._refresh_names()
+
+    def _refresh_names(self):
+        self.event_names = frozenset(name for name, cbs in self._listeners.items() if cbs)
 
     def dispatch(self, message: dict):
         req_id = str(message.get("request_id", ""))
@@ -37,11 +46,17 @@ class Dispatcher:
 
         # 2. Stream de Dados (Listeners)
         if name and name in self._listeners:
+            monitor = self.monitor
             for cb in list(self._listeners[name]):
                 try:
                     if asyncio.iscoroutinefunction(cb):
-                        asyncio.create_task(cb(message))
-                    else:
+                        if monitor is None:
+                            asyncio.create_task(cb(message))
+                        else:
+                            monitor.task(name, cb(message))
+                    elif monitor is None:
                         cb(message)
+                    else:
+                        monitor.call(name, cb, message)
                 except Exception as e:
                     logger.error("listener_error", event=name, error=str(e))
@@ -0,0 +1,205 @@
+import bisect
+import json
+import os
+import queue
+import threading
+import time
+from typing import Iterator, List, Optional
+from myiq.core.log import get_logger
+
+logger = get_logger()
+
+FSYNC_BATCH = "batch"        # fsync a cada lote gravado
+FSYNC_INTERVAL = "interval"  # fsync no máximo a cada fsync_interval segundos
+FSYNC_NEVER = "never"        # deixa o SO decidir
+
+EV_DECISION = "decision"
+EV_ORDER = "order"
+EV_RESULT = "result"
+EV_ERROR = "error"
+
+_STOP = object()
+
+
+class TradeStats:
+    """Estatísticas de trades mantidas incrementalmente (O(1) por resultado)."""
+
+    __slots__ = ("trades", "wins", "losses", "total_pnl")
+
+    def __init__(self):
+        self.trades = 0
+        self.wins = 0
+        self.losses = 0
+        self.total_pnl = 0.0
+
+    def add(self, pnl: float):
+        self.trades += 1
+        if pnl > 0:
+            self.wins += 1
+        else:
+            self.losses += 1
+        self.total_pnl += pnl
+
+    @property
+    def winrate(self) -> float:
+        return self.wins / self.trades if self.trades else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "trades": self.trades,
+            "wins": self.wins,
+            "losses": self.losses,
+            "total_pnl": self.total_pnl,
+            "winrate": self.winrate
+        }
+
+
+class JournalReader:
+    """
+    Leitor indexado de um journal JSON Lines.
+    O índice (offset, ts, kind) é construído uma vez e estendido em refresh().
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._offsets: List[int] = []
+        self._ts: List[float] = []
+        self._kinds: List[str] = []
+        self._end = 0
+        self.refresh()
+
+    def refresh(self) -> int:
+        """Indexa linhas novas anexadas desde a última leitura. Retorna quantas."""
+        if not os.path.exists(self.path):
+            return 0
+        added = 0
+        with open(self.path, "rb") as f:
+            f.seek(self._end)
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                # linha incompleta (escrita em andamento) fica para o próximo refresh
+                if not line or not line.endswith(b"\n"):
+                    break
+                self._end = f.tell()
+                try:
+                    evt = json.loads(line)
+                except Exception:
+                    continue
+                self._offsets.append(offset)
+                self._ts.append(float(evt.get("ts", 0)))
+                self._kinds.append(evt.get("kind", ""))
+                added += 1
+        return added
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __getitem__(self, i: int) -> dict:
+        with open(self.path, "rb") as f:
+            f.seek(self._offsets[i])
+            return json.loads(f.readline())
+
+    def events(self, kind: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None) -> Iterator[dict]:
+        """Itera eventos filtrando por tipo e intervalo [since, until) de tempo."""
+        lo = bisect.bisect_left(self._ts, since) if since is not None else 0
+        hi = bisect.bisect_left(self._ts, until) if until is not None else len(self._ts)
+        if lo >= hi:
+            return
+        with open(self.path, "rb") as f:
+            for i in range(lo, hi):
+                if kind is not None and self._kinds[i] != kind:
+                    continue
+                f.seek(self._offsets[i])
+                yield json.loads(f.readline())
+
+
+class EventJournal:
+    """
+    Journal append-only (JSON Lines) de decisões, ordens e resultados.
+    record() só enfileira; serialização e escrita em disco rodam numa thread
+    de fundo com lotes, então o event loop nunca bloqueia em I/O.
+    """
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 0.5,
+                 fsync: str = FSYNC_BATCH, fsync_interval: float = 1.0):
+        if fsync not in (FSYNC_BATCH, FSYNC_INTERVAL, FSYNC_NEVER):
+            raise ValueError(f"Politica de fsync invalida: {fsync}")
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+
+        # estatísticas restauradas do que já está em disco
+        self.stats = TradeStats()
+        for evt in JournalReader(path).events(kind=EV_RESULT):
+            self.stats.add(float(evt.get("pnl", 0) or 0))
+
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._file = open(path, "ab")
+        self._last_fsync = time.monotonic()
+        self._thread = threading.Thread(target=self._writer, name="myiq-journal", daemon=True)
+        self._thread.start()
+
+    def record(self, kind: str, **fields):
+        """Registra um evento (não bloqueante)."""
+        evt = {"ts": time.time(), "kind": kind}
+        evt.update(fields)
+        if kind == EV_RESULT:
+            self.stats.add(float(fields.get("pnl", 0) or 0))
+        self._queue.put(evt)
+
+    def reader(self) -> JournalReader:
+        return JournalReader(self.path)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Grava o que estiver pendente e encerra a thread de escrita."""
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # -------------------------
+    # thread de escrita
+    # -------------------------
+    def _writer(self):
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+        try:
+            self._file.flush()
+            if self.fsync != FSYNC_NEVER:
+                os.fsync(self._file.fileno())
+            self._file.close()
+        except Exception as e:
+            logger.error("journal_close_error", error=str(e))
+
+    def _write_batch(self, batch: list):
+        try:
+            data = b"".join(json.dumps(evt, default=str).encode() + b"\n" for evt in batch)
+            self._file.write(data)
+            self._file.flush()
+            now = time.monotonic()
+            if self.fsync == FSYNC_BATCH or (self.fsync == FSYNC_INTERVAL and now - self._last_fsync >= self.fsync_interval):
+                os.fsync(self._file.fileno())
+                self._last_fsync = now
+        except Exception as e:
+            logger.error("journal_write_error", error=str(e), events=len(batch))
@@ -0,0 +1,264 @@
+import atexit
+import datetime
+import sys
+import threading
+import time
+import structlog
+from collections import deque
+from typing import Dict, Optional
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+_LEVELS = {"debug": DEBUG, "info": INFO, "warning": WARNING, "error": ERROR}
+_NAMES = {v: k for k, v in _LEVELS.items()}
+
+# eventos de alta frequência limitados por padrão (registros/segundo)
+DEFAULT_RATE_LIMITS = {
+    "listener_error": 10.0,
+    "candle_parse_error": 10.0,
+    "balance_parse_error": 10.0,
+    "tick_record_error": 10.0,
+}
+
+
+class _Config:
+    __slots__ = ("level", "sample", "rate_limit", "flush_interval", "max_pending")
+
+    def __init__(self):
+        self.level = INFO
+        self.sample: Dict[str, int] = {}        # evento -> registra 1 a cada N
+        self.rate_limit: Dict[str, float] = dict(DEFAULT_RATE_LIMITS)
+        self.flush_interval = 0.05
+        self.max_pending = 100_000
+
+
+_config = _Config()
+# deque.append/popleft são atômicos sob o GIL: fila sem lock entre loop e writer
+# (sem maxlen: o limite é checado no append para contar o descarte)
+_pending: deque = deque()
+_counters: Dict[str, int] = {}
+_buckets: Dict[str, list] = {}        # evento -> [tokens, último refill]
+# descartes por evento: só mexido no lado de quem loga (sob _lock), nunca pelo writer
+_dropped: Dict[str, int] = {}
+_lock = threading.Lock()
+_writer: Optional[threading.Thread] = None
+_wakeup = threading.Event()
+_stopping = False
+# chave interna com o instante do registro (capturado no chamador)
+_TS_KEY = "_myiq_ts"
+
+
+def configure_logging(level: str = "info", sample: Optional[Dict[str, float]] = None,
+                      rate_limit: Optional[Dict[str, float]] = None, flush_interval: float = 0.05,
+                      max_pending: int = 100_000):
+    """
+    level: nível mínimo ("debug", "info", "warning", "error")
+    sample: evento -> fração registrada (ex: {"candle_parse_error": 0.01} = 1 em 100)
+    rate_limit: evento -> máximo de registros por segundo (substitui os padrões)
+    """
+    _config.level = _LEVELS[level.lower()]
+    _config.sample = {ev: max(1, int(round(1.0 / rate))) for ev, rate in (sample or {}).items() if rate > 0}
+    _config.rate_limit = dict(DEFAULT_RATE_LIMITS if rate_limit is None else rate_limit)
+    _config.flush_interval = flush_interval
+    _config.max_pending = max_pending
+    with _lock:
+        _counters.clear()
+        _buckets.clear()
+
+
+def _admit(event: str) -> bool:
+    # chamado com _lock
+    # amostragem determinística: 1 a cada N
+    every = _config.sample.get(event)
+    if every is not None:
+        n = _counters.get(event, 0)
+        _counters[event] = n + 1
+        if n % every:
+            _dropped[event] = _dropped.get(event, 0) + 1
+            return False
+    # token bucket por evento
+    rate = _config.rate_limit.get(event)
+    if rate is not None:
+        now = time.monotonic()
+        bucket = _buckets.get(event)
+        if bucket is None:
+            bucket = _buckets[event] = [rate, now]
+        tokens = min(rate, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        if tokens < 1.0:
+            bucket[0] = tokens
+            _dropped[event] = _dropped.get(event, 0) + 1
+            return False
+        bucket[0] = tokens - 1.0
+    return True
+
+
+class FastLogger:
+    """
+    Logger com a mesma interface do structlog (logger.info("evento", k=v)).
+    Filtro por nível/amostragem/limite roda no chamador; formatação e escrita
+    acontecem numa thread de fundo.
+    """
+
+    __slots__ = ("_bound",)
+
+    def __init__(self, bound: Optional[dict] = None):
+        self._bound = bound
+
+    def bind(self, **kw) -> "FastLogger":
+        ctx = dict(self._bound or {})
+        ctx.update(kw)
+        return FastLogger(ctx)
+
+    def is_enabled(self, level: int) -> bool:
+        return level >= _config.level
+
+    def _log(self, level: int, event: str, kw: dict):
+        if level < _config.level:
+            return
+        if kw.get("exc_info") is True:
+            # exceção capturada aqui: na thread de escrita ela já não existe
+            kw["exc_info"] = sys.exc_info()
+        limited = event in _config.sample or event in _config.rate_limit
+        if limited or event in _dropped:
+            with _lock:
+                if limited and not _admit(event):
+                    return
+                if len(_pending) >= _config.max_pending:
+                    _dropped[event] = _dropped.get(event, 0) + 1
+                    return
+                # descartes anteriores seguem no próximo registro aceito do evento
+                dropped = _dropped.pop(event, 0)
+            if dropped:
+                kw["dropped"] = dropped
+        elif len(_pending) >= _config.max_pending:
+            with _lock:
+                _dropped[event] = _dropped.get(event, 0) + 1
+            return
+        if self._bound:
+            kw = {**self._bound, **kw}
+        _pending.append((level, event, kw, time.time()))
+
+    def debug(self, event: str, **kw):
+        if DEBUG >= _config.level:
+            self._log(DEBUG, event, kw)
+
+    def info(self, event: str, **kw):
+        if INFO >= _config.level:
+            self._log(INFO, event, kw)
+
+    def warning(self, event: str, **kw):
+        if WARNING >= _config.level:
+            self._log(WARNING, event, kw)
+
+    def error(self, event: str, **kw):
+        self._log(ERROR, event, kw)
+
+    def exception(self, event: str, **kw):
+        kw.setdefault("exc_info", sys.exc_info())
+        self._log(ERROR, event, kw)
+
+    warn = warning
+
+
+def _format_ts(ts: float, fmt: Optional[str], utc: bool):
+    # mesmo formato do TimeStamper do structlog, mas com o instante do registro
+    if fmt is None:
+        return ts
+    if utc:
+        dt = datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc)
+    else:
+        dt = datetime.datetime.fromtimestamp(ts)
+    if fmt.upper() == "ISO":
+        return dt.isoformat().replace("+00:00", "Z") if utc else dt.isoformat()
+    return dt.strftime(fmt) if utc else dt.astimezone().strftime(fmt)
+
+
+class _RecordTimeStamper:
+    """Substitui um TimeStamper da configuração: carimba a hora do registro, não a da escrita."""
+
+    __slots__ = ("_stamper",)
+
+    def __init__(self, stamper):
+        self._stamper = stamper
+
+    def __call__(self, logger, name, event_dict):
+        ts = event_dict.pop(_TS_KEY, None)
+        if ts is None:
+            return self._stamper(logger, name, event_dict)
+        st = self._stamper
+        event_dict[st.key] = _format_ts(ts, st.fmt, st.utc)
+        return event_dict
+
+
+def _drop_ts(logger, name, event_dict):
+    event_dict.pop(_TS_KEY, None)
+    return event_dict
+
+
+_out_cache: list = [None, None]       # [processadores configurados, logger de saída]
+
+
+def _output():
+    # refeito quando o structlog é (re)configurado depois do import da myiq
+    procs = structlog.get_config()["processors"]
+    if _out_cache[0] is not procs:
+        wrapped = [_RecordTimeStamper(p) if isinstance(p, structlog.processors.TimeStamper) else p
+                   for p in procs]
+        if not any(isinstance(p, _RecordTimeStamper) for p in wrapped):
+            wrapped.insert(0, _drop_ts)
+        _out_cache[0] = procs
+        _out_cache[1] = structlog.wrap_logger(None, processors=wrapped)
+    return _out_cache[1]
+
+
+def _drain():
+    out = None
+    while True:
+        try:
+            level, event, kw, ts = _pending.popleft()
+        except IndexError:
+            return
+        if out is None:
+            out = _output()
+        kw[_TS_KEY] = ts
+        try:
+            getattr(out, _NAMES[level])(event, **kw)
+        except Exception:
+            pass
+
+
+def _run():
+    while not _stopping:
+        _wakeup.wait(_config.flush_interval)
+        _wakeup.clear()
+        _drain()
+    _drain()
+
+
+def flush(timeout: float = 1.0):
+    """Aguarda (até timeout) a fila de registros esvaziar."""
+    end = time.monotonic() + timeout
+    _wakeup.set()
+    while _pending and time.monotonic() < end:
+        time.sleep(0.005)
+
+
+def _shutdown():
+    global _stopping
+    _stopping = True
+    _wakeup.set()
+    if _writer is not None:
+        _writer.join(1.0)
+
+
+def get_logger(**initial) -> FastLogger:
+    global _writer
+    if _writer is None:
+        _writer = threading.Thread(target=_run, name="myiq-log", daemon=True)
+        _writer.start()
+        atexit.register(_shutdown)
+    return FastLogger(initial or None)
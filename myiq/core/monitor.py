@@ -0,0 +1,212 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Callable, Dict, Optional
+
+from myiq.core.log import get_logger
+
+logger = get_logger()
+
+_perf = time.perf_counter
+
+
+class _CallbackStats:
+    __slots__ = ("count", "total", "max", "slow")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+
+
+class _TimedAwaitable:
+    """Executa a coroutine medindo cada passo (tempo em que ela segura o loop)."""
+
+    __slots__ = ("_coro", "_name", "_mon")
+
+    def __init__(self, coro, name: str, mon: "LoopMonitor"):
+        self._coro = coro
+        self._name = name
+        self._mon = mon
+
+    def __await__(self):
+        coro, name, mon = self._coro, self._name, self._mon
+        value, exc = None, None
+        total = worst = 0.0
+        while True:
+            prev = mon.current
+            mon.current = name
+            t0 = _perf()
+            try:
+                if exc is None:
+                    yielded = coro.send(value)
+                else:
+                    yielded = coro.throw(exc)
+            except StopIteration as e:
+                dt = _perf() - t0
+                mon.current = prev
+                mon.record(name, total + dt, max(worst, dt))
+                return e.value
+            except BaseException:
+                dt = _perf() - t0
+                mon.current = prev
+                mon.record(name, total + dt, max(worst, dt))
+                raise
+            dt = _perf() - t0
+            mon.current = prev
+            total += dt
+            if dt > worst:
+                worst = dt
+            try:
+                value, exc = (yield yielded), None
+            except BaseException as e:
+                value, exc = None, e
+
+
+class LoopMonitor:
+    """
+    Monitor de saúde do event loop:
+    - mede o atraso de agendamento (lag) continuamente;
+    - cronometra listeners/tasks por nome de evento;
+    - uma thread watchdog captura a stack do loop quando ele trava além do limite.
+    """
+
+    def __init__(self, interval: float = 0.1, slow_threshold: float = 0.05, max_samples: int = 20):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.current: Optional[str] = None      # callback rodando agora (para atribuir travadas)
+
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self.lag_avg = 0.0                      # média móvel exponencial
+        self._callbacks: Dict[str, _CallbackStats] = {}
+        self.stalls: deque = deque(maxlen=max_samples)
+        self._open_stall: Optional[dict] = None  # travada em andamento (duração ainda crescendo)
+
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._loop_thread: Optional[int] = None
+        self._beat = 0.0
+        self._running = False
+
+    # -------------------------
+    # ciclo de vida
+    # -------------------------
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._loop_thread = threading.get_ident()
+        self._beat = _perf()
+        self._task = asyncio.get_running_loop().create_task(self._probe())
+        self._watchdog = threading.Thread(target=self._watch, name="myiq-loop-watchdog", daemon=True)
+        self._watchdog.start()
+        logger.info("loop_monitor_started", interval=self.interval, threshold=self.slow_threshold)
+
+    def stop(self):
+        self._running = False
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+        self._task = None
+
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        while self._running:
+            t = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - t - self.interval)
+            self._beat = _perf()
+            stall = self._open_stall
+            if stall is not None:
+                # loop voltou: duração final medida pelo próprio probe
+                self._open_stall = None
+                stall["blocked_for"] = max(stall["blocked_for"], lag)
+                logger.warning("loop_stall_end", callback=stall["callback"], blocked_for=round(stall["blocked_for"], 4))
+            self.lag_last = lag
+            if lag > self.lag_max:
+                self.lag_max = lag
+            self.lag_avg = self.lag_avg * 0.9 + lag * 0.1
+
+    def _watch(self):
+        limit = self.interval + self.slow_threshold
+        stalled_since = None
+        while self._running:
+            time.sleep(self.slow_threshold / 2)
+            since = _perf() - self._beat
+            if since <= limit:
+                stalled_since = None
+                continue
+            # uma amostra de stack por travada; a duração segue sendo atualizada
+            if stalled_since == self._beat:
+                stall = self._open_stall
+                if stall is not None:
+                    stall["blocked_for"] = since - self.interval
+                continue
+            stalled_since = self._beat
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = traceback.format_stack(frame) if frame is not None else []
+            stall = {
+                "at": time.time(),
+                "blocked_for": since - self.interval,
+                "callback": self.current,
+                "stack": stack[-12:]
+            }
+            self.stalls.append(stall)
+            self._open_stall = stall
+            logger.warning("loop_stall", callback=self.current, blocked_for=round(since - self.interval, 4))
+
+    # -------------------------
+    # medição de callbacks
+    # -------------------------
+    def record(self, name: str, total: float, worst: float):
+        st = self._callbacks.get(name)
+        if st is None:
+            st = self._callbacks[name] = _CallbackStats()
+        st.count += 1
+        st.total += total
+        if worst > st.max:
+            st.max = worst
+        if worst >= self.slow_threshold:
+            st.slow += 1
+
+    def call(self, name: str, fn: Callable, *args):
+        """Chama fn(*args) sync medindo o tempo."""
+        prev = self.current
+        self.current = name
+        t0 = _perf()
+        try:
+            return fn(*args)
+        finally:
+            dt = _perf() - t0
+            self.current = prev
+            self.record(name, dt, dt)
+
+    def task(self, name: str, coro) -> asyncio.Task:
+        """create_task medindo cada passo da coroutine no loop."""
+        return asyncio.create_task(self._run(name, coro))
+
+    async def _run(self, name: str, coro):
+        return await _TimedAwaitable(coro, name, self)
+
+    # -------------------------
+    # estatísticas
+    # -------------------------
+    def top(self, n: int = 10, key: str = "max") -> list:
+        rows = [
+            {"name": name, "count": s.count, "total": s.total, "avg": s.total / s.count if s.count else 0.0,
+             "max": s.max, "slow": s.slow}
+            for name, s in self._callbacks.items()
+        ]
+        rows.sort(key=lambda r: r[key], reverse=True)
+        return rows[:n]
+
+    def stats(self, n: int = 10) -> dict:
+        return {
+            "lag": {"last": self.lag_last, "avg": self.lag_avg, "max": self.lag_max},
+            "top_callbacks": self.top(n),
+            "stalls": list(self.stalls)
+        }
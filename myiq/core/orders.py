@@ -0,0 +1,65 @@
+import json
+from myiq.core.constants import OP_OPEN_OPTION, OPTION_TYPE_BLITZ
+
+# marcadores substituídos no momento do envio
+_PH_REQ_ID = "\x00req_id\x00"
+_PH_DIRECTION = "\x00direction\x00"
+_PH_EXPIRED = "\x00expired\x00"
+_PH_PRICE = "\x00price\x00"
+
+_DIRECTIONS = ("call", "put")
+
+
+class BlitzOrderTemplate:
+    """
+    Frame de open-option pré-serializado para (saldo, ativo, duração).
+    No envio só request_id, direction, expired e price são inseridos no texto.
+    """
+
+    __slots__ = ("balance_id", "active_id", "duration", "_parts")
+
+    def __init__(self, balance_id: int, active_id: int, duration: int = 30, profit_percent: int = 85):
+        self.balance_id = int(balance_id)
+        self.active_id = int(active_id)
+        self.duration = int(duration)
+
+        # mesmo formato de WsRequest(...).model_dump() usado antes
+        payload = {
+            "name": "sendMessage",
+            "request_id": _PH_REQ_ID,
+            "msg": {
+                "name": OP_OPEN_OPTION,
+                "version": "2.0",
+                "body": {
+                    "user_balance_id": self.balance_id,
+                    "active_id": self.active_id,
+                    "option_type_id": OPTION_TYPE_BLITZ,
+                    "direction": _PH_DIRECTION,
+                    "expired": _PH_EXPIRED,
+                    "expiration_size": self.duration,
+                    "refund_value": 0,
+                    "price": _PH_PRICE,
+                    "value": 0,
+                    "profit_percent": profit_percent
+                }
+            }
+        }
+        text = json.dumps(payload)
+        # quebra o texto nos marcadores; strings ficam com aspas, números sem
+        parts = []
+        for ph, quoted in ((_PH_REQ_ID, True), (_PH_DIRECTION, True), (_PH_EXPIRED, False), (_PH_PRICE, False)):
+            token = json.dumps(ph)
+            head, text = text.split(token, 1)
+            parts.append(head + ('"' if quoted else ""))
+            text = ('"' if quoted else "") + text
+        parts.append(text)
+        self._parts = tuple(parts)
+
+    def render(self, request_id: str, direction: str, amount: float, expired: int) -> str:
+        """Monta o frame final (texto JSON) sem passar por pydantic/json.dumps."""
+        direction = direction.lower()
+        if direction not in _DIRECTIONS:
+            raise ValueError(f"Direcao invalida: {direction}")
+        p = self._parts
+        return (p[0] + str(request_id) + p[1] + direction + p[2] + str(int(expired))
+                + p[3] + repr(float(amount)) + p[4])
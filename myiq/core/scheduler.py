@@ -0,0 +1,131 @@
+import asyncio
+import heapq
+import itertools
+from typing import Callable, List, Optional, Tuple
+from myiq.core.log import get_logger
+
+logger = get_logger()
+
+# tolerância para considerar um timer vencido (o loop pode acordar um pouco antes)
+_FIRE_TOLERANCE = 0.0005
+
+
+class ScheduledCall:
+    """Handle de um disparo agendado; use cancel() para remover."""
+
+    __slots__ = ("when", "callback", "duration", "offset", "cancelled")
+
+    def __init__(self, when: float, callback: Callable, duration: Optional[int] = None, offset: float = 0.0):
+        self.when = when
+        self.callback = callback
+        # duration != None => recorrente a cada candle
+        self.duration = duration
+        self.offset = offset
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+def next_boundary(now: float, duration: int, offset: float = 0.0) -> float:
+    """
+    Próximo instante (tempo do servidor, em segundos) igual a abertura de candle + offset
+    que seja estritamente maior que `now`. Offset negativo = antes do fechamento
+    (ex: duration=60, offset=-0.5 -> 500ms antes de fechar o candle atual).
+    """
+    start = (now // duration) * duration
+    target = start + offset
+    while target <= now:
+        target += duration
+    return target
+
+
+class CandleScheduler:
+    """
+    Dispara callbacks em offsets precisos a partir das fronteiras de candle,
+    usando o relógio do servidor (clock) e um único heap de timers.
+    """
+
+    def __init__(self, clock: Callable[[], float]):
+        # clock retorna o tempo do servidor em segundos (float)
+        self.clock = clock
+        self._heap: List[Tuple[float, int, ScheduledCall]] = []
+        self._seq = itertools.count()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._armed_for: Optional[float] = None
+
+    def call_at(self, server_time: float, callback: Callable) -> ScheduledCall:
+        """Agenda callback para um timestamp absoluto do servidor (segundos)."""
+        return self._push(ScheduledCall(float(server_time), callback))
+
+    def call_at_candle(self, duration: int, offset: float, callback: Callable) -> ScheduledCall:
+        """Agenda um único disparo na próxima fronteira de candle + offset."""
+        when = next_boundary(self.clock(), duration, offset)
+        return self._push(ScheduledCall(when, callback))
+
+    def every_candle(self, duration: int, offset: float, callback: Callable) -> ScheduledCall:
+        """Agenda disparo recorrente em toda fronteira de candle + offset."""
+        when = next_boundary(self.clock(), duration, offset)
+        return self._push(ScheduledCall(when, callback, duration=duration, offset=offset))
+
+    def cancel_all(self):
+        for _, _, call in self._heap:
+            call.cancel()
+        self._heap.clear()
+        self._disarm()
+
+    def __len__(self):
+        return sum(1 for _, _, c in self._heap if not c.cancelled)
+
+    # -------------------------
+    # internos
+    # -------------------------
+    def _push(self, call: ScheduledCall) -> ScheduledCall:
+        heapq.heappush(self._heap, (call.when, next(self._seq), call))
+        if self._armed_for is None or call.when < self._armed_for:
+            self._arm()
+        return call
+
+    def _disarm(self):
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = None
+        self._armed_for = None
+
+    def _arm(self):
+        self._disarm()
+        # descarta cancelados no topo
+        while self._heap and self._heap[0][2].cancelled:
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return
+        when = self._heap[0][0]
+        loop = asyncio.get_running_loop()
+        # converte tempo do servidor -> tempo do loop no momento de armar;
+        # o offset pode mudar (timeSync), por isso revalidamos ao disparar
+        delay = max(0.0, when - self.clock())
+        self._timer = loop.call_at(loop.time() + delay, self._on_timer)
+        self._armed_for = when
+
+    def _on_timer(self):
+        self._timer = None
+        self._armed_for = None
+        now = self.clock()
+        while self._heap and self._heap[0][0] <= now + _FIRE_TOLERANCE:
+            _, _, call = heapq.heappop(self._heap)
+            if call.cancelled:
+                continue
+            self._fire(call)
+            if call.duration and not call.cancelled:
+                call.when = next_boundary(max(now, call.when), call.duration, call.offset)
+                heapq.heappush(self._heap, (call.when, next(self._seq), call))
+        self._arm()
+
+    def _fire(self, call: ScheduledCall):
+        try:
+            if asyncio.iscoroutinefunction(call.callback):
+                asyncio.create_task(call.callback())
+            else:
+                call.callback()
+        except Exception as e:
+            logger.error("scheduler_callback_error", error=str(e))
@@ -0,0 +1,249 @@
+import bisect
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from myiq.core.constants import EV_CANDLE_GENERATED
+from myiq.core.log import get_logger
+
+logger = get_logger()
+
+# registro fixo: at (ns), from, open, close, min, max, volume
+RECORD = struct.Struct("<qqddddd")
+RECORD_SIZE = RECORD.size
+# bloco de índice: (at ns, número do registro) a cada INDEX_EVERY registros
+INDEX = struct.Struct("<qq")
+INDEX_EVERY = 1024
+
+SEGMENT_EXT = ".ticks"
+INDEX_EXT = ".idx"
+
+_STOP = object()
+
+
+def _segment_name(at_ns: int) -> str:
+    # um segmento por dia (UTC)
+    return time.strftime("%Y%m%d", time.gmtime(at_ns // 1_000_000_000))
+
+
+def _tick_at_ns(data: dict) -> int:
+    at = data.get("at")
+    if at:
+        return int(at)
+    return int(data.get("to") or data.get("from") or 0) * 1_000_000_000
+
+
+def _repair_segment(path: str) -> int:
+    """
+    Descarta o registro parcial deixado por um crash no fim do segmento e as
+    entradas de índice que apontam além dele. Retorna o número de registros.
+    """
+    data_path = path + SEGMENT_EXT
+    size = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+    count = size // RECORD_SIZE
+    if size != count * RECORD_SIZE:
+        logger.warning("tick_segment_truncated", path=data_path, dropped_bytes=size - count * RECORD_SIZE)
+        os.truncate(data_path, count * RECORD_SIZE)
+    index_path = path + INDEX_EXT
+    if os.path.exists(index_path):
+        with open(index_path, "rb") as f:
+            raw = f.read()
+        keep = 0
+        for off in range(0, len(raw) - INDEX.size + 1, INDEX.size):
+            if INDEX.unpack_from(raw, off)[1] >= count:
+                break
+            keep = off + INDEX.size
+        if keep != len(raw):
+            os.truncate(index_path, keep)
+    return count
+
+
+class _Segment:
+    __slots__ = ("data", "index", "count")
+
+    def __init__(self, path: str):
+        # append após um registro parcial desalinharia todos os registros seguintes
+        self.count = _repair_segment(path)
+        self.data = open(path + SEGMENT_EXT, "ab")
+        self.index = open(path + INDEX_EXT, "ab")
+
+    def close(self):
+        self.data.close()
+        self.index.close()
+
+
+class TickRecorder:
+    """
+    Grava os ticks do candle-generated em segmentos append-only por (active_id, size).
+    No event loop só há um put numa fila; empacotamento e escrita ficam numa thread.
+    """
+
+    def __init__(self, root: str, flush_interval: float = 0.5, batch_size: int = 4096):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._segments: Dict[Tuple[int, int, str], _Segment] = {}
+        self.recorded = 0
+        os.makedirs(root, exist_ok=True)
+        self._thread = threading.Thread(target=self._writer, name="myiq-ticks", daemon=True)
+        self._thread.start()
+
+    def attach(self, dispatcher):
+        """Registra o recorder como listener do candle-generated no Dispatcher."""
+        dispatcher.add_listener(EV_CANDLE_GENERATED, self.on_message)
+
+    def detach(self, dispatcher):
+        dispatcher.remove_listener(EV_CANDLE_GENERATED, self.on_message)
+
+    def on_message(self, msg: dict):
+        data = msg.get("msg")
+        if data:
+            self._queue.put(data)
+
+    def close(self, timeout: Optional[float] = 5.0):
+        if not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # -------------------------
+    # thread de escrita
+    # -------------------------
+    def _writer(self):
+        stop = False
+        while not stop:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            while True:
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write_batch(batch)
+        for seg in self._segments.values():
+            seg.close()
+        self._segments.clear()
+
+    def _segment(self, active_id: int, size: int, name: str) -> _Segment:
+        key = (active_id, size, name)
+        seg = self._segments.get(key)
+        if seg is None:
+            # fecha segmentos de dias anteriores do mesmo ativo
+            for old in [k for k in self._segments if k[:2] == key[:2]]:
+                self._segments.pop(old).close()
+            folder = os.path.join(self.root, f"{active_id}_{size}")
+            os.makedirs(folder, exist_ok=True)
+            seg = _Segment(os.path.join(folder, name))
+            self._segments[key] = seg
+        return seg
+
+    def _write_batch(self, batch: List[dict]):
+        touched = set()
+        for data in batch:
+            try:
+                at = _tick_at_ns(data)
+                seg = self._segment(int(data["active_id"]), int(data["size"]), _segment_name(at))
+                if seg.count % INDEX_EVERY == 0:
+                    seg.index.write(INDEX.pack(at, seg.count))
+                seg.data.write(RECORD.pack(
+                    at, int(data.get("from", 0)),
+                    float(data.get("open", 0)), float(data.get("close", 0)),
+                    float(data.get("min", 0)), float(data.get("max", 0)),
+                    float(data.get("volume", 0) or 0)
+                ))
+                seg.count += 1
+                touched.add(seg)
+            except Exception as e:
+                logger.error("tick_record_error", error=str(e))
+        for seg in touched:
+            try:
+                seg.data.flush()
+                seg.index.flush()
+            except Exception as e:
+                logger.error("tick_flush_error", error=str(e))
+        self.recorded += len(batch)
+
+
+class TickReader:
+    """Leitura por intervalo de tempo via mmap dos segmentos gravados pelo TickRecorder."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def keys(self) -> List[Tuple[int, int]]:
+        out = []
+        if not os.path.isdir(self.root):
+            return out
+        for name in sorted(os.listdir(self.root)):
+            try:
+                active_id, size = name.split("_")
+                out.append((int(active_id), int(size)))
+            except ValueError:
+                continue
+        return out
+
+    def segments(self, active_id: int, size: int) -> List[str]:
+        folder = os.path.join(self.root, f"{active_id}_{size}")
+        if not os.path.isdir(folder):
+            return []
+        return sorted(os.path.join(folder, f[:-len(SEGMENT_EXT)])
+                      for f in os.listdir(folder) if f.endswith(SEGMENT_EXT))
+
+    def read(self, active_id: int, size: int, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[dict]:
+        """
+        Itera ticks com start <= at < end (segundos), no formato do candle-generated.
+        """
+        start_ns = int(start * 1_000_000_000) if start is not None else None
+        end_ns = int(end * 1_000_000_000) if end is not None else None
+        first_day = _segment_name(start_ns) if start_ns is not None else None
+        last_day = _segment_name(end_ns) if end_ns is not None else None
+
+        for path in self.segments(active_id, size):
+            day = os.path.basename(path)
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            for tick in self._read_segment(path, start_ns, end_ns):
+                tick["active_id"] = active_id
+                tick["size"] = size
+                tick["to"] = tick["from"] + size
+                yield tick
+
+    def _read_segment(self, path: str, start_ns: Optional[int], end_ns: Optional[int]) -> Iterator[dict]:
+        if os.path.getsize(path + SEGMENT_EXT) < RECORD_SIZE:
+            return
+        begin = 0
+        if start_ns is not None and os.path.exists(path + INDEX_EXT):
+            with open(path + INDEX_EXT, "rb") as f:
+                raw = f.read()
+            entries = [INDEX.unpack_from(raw, o) for o in range(0, len(raw) - INDEX.size + 1, INDEX.size)]
+            # último bloco cujo primeiro tick é < start
+            pos = bisect.bisect_left([e[0] for e in entries], start_ns) - 1
+            if pos >= 0:
+                begin = entries[pos][1]
+        with open(path + SEGMENT_EXT, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # ignora registro parcial no fim (escrita em andamento)
+                count = len(mm) // RECORD_SIZE
+                unpack = RECORD.unpack_from
+                for i in range(begin, count):
+                    at, frm, o, c, lo, hi, vol = unpack(mm, i * RECORD_SIZE)
+                    if start_ns is not None and at < start_ns:
+                        continue
+                    if end_ns is not None and at >= end_ns:
+                        break
+                    yield {"at": at, "from": frm, "open": o, "close": c, "min": lo, "max": hi, "volume": vol}
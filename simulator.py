@@ -0,0 +1,253 @@
+# simulator.py
+import asyncio
+import heapq
+import itertools
+import json
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from myiq.models.base import Balance, Candle
+
+
+def tick_time(data: dict) -> float:
+    """Timestamp (segundos) de um tick do candle-generated."""
+    at = data.get("at")
+    if at:
+        # 'at' vem em nanossegundos
+        return float(at) / 1e9 if at > 1e12 else float(at)
+    return float(data.get("to") or data.get("from") or 0)
+
+
+def load_ticks(path: str) -> List[dict]:
+    """Carrega ticks gravados em JSON Lines (um payload de candle-generated por linha)."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class _SimOrder:
+    __slots__ = ("active_id", "direction", "amount", "open_price", "expired", "future")
+
+    def __init__(self, active_id, direction, amount, open_price, expired, future):
+        self.active_id = active_id
+        self.direction = direction
+        self.amount = amount
+        self.open_price = open_price
+        self.expired = expired
+        self.future = future
+
+
+class SimulatedIQOption:
+    """
+    Substituto do IQOption que reproduz ticks gravados num relógio virtual.
+    Expõe a mesma superfície usada pelo MomentumProBot (start_candles_stream,
+    get_candles, get_balances/get_balance, subscribe_balance_changes, buy_blitz),
+    então o bot roda sem alterações, tão rápido quanto a CPU permitir.
+    """
+
+    def __init__(
+        self,
+        ticks: Iterable[dict],
+        history: Optional[List[Candle]] = None,
+        balance: float = 1000.0,
+        payout: float = 0.85,
+        balance_id: int = 1,
+        balance_type: int = 4,
+        currency: str = "USD"
+    ):
+        self.ticks = ticks
+        self.payout = payout
+        self.now = 0.0
+        self.connected = True
+
+        self.active_balance_id: Optional[int] = balance_id
+        self.balances: Dict[int, Balance] = {
+            balance_id: Balance(id=balance_id, type=balance_type, amount=balance, currency=currency)
+        }
+        self._balance_callbacks: List[Callable[[Balance], None]] = []
+
+        self._streams: Dict[Tuple[int, int], List[Callable]] = {}
+        self._history: Dict[Tuple[int, int], List[Candle]] = {}
+        self._current: Dict[Tuple[int, int], dict] = {}
+        self._last_price: Dict[int, float] = {}
+        for c in history or []:
+            # histórico sem active_id explícito fica disponível para qualquer ativo
+            self._history.setdefault(None, []).append(c)
+        # relógio começa no fim do histórico (warm-up vê tudo)
+        if history:
+            self.now = float(max(c.to_time for c in history))
+
+        self._orders: List[Tuple[int, int, _SimOrder]] = []
+        self._seq = itertools.count()
+        self._candle_ids = itertools.count(1)
+        self.ticks_replayed = 0
+        self.candles_closed = 0
+        self.orders = 0
+
+    # -------------------------
+    # Relógio
+    # -------------------------
+    def get_server_timestamp(self) -> int:
+        return int(self.now)
+
+    def get_server_time(self) -> float:
+        return self.now
+
+    # -------------------------
+    # Ciclo de vida
+    # -------------------------
+    async def start(self):
+        self.connected = True
+
+    async def close(self):
+        self.connected = False
+
+    # -------------------------
+    # Saldos
+    # -------------------------
+    async def get_balances(self) -> List[Balance]:
+        return list(self.balances.values())
+
+    def get_balance(self, balance_id: Optional[int] = None) -> Optional[Balance]:
+        if balance_id is None:
+            balance_id = self.active_balance_id
+        if balance_id is None:
+            return None
+        return self.balances.get(int(balance_id))
+
+    async def change_balance(self, balance_id: int):
+        self.active_balance_id = int(balance_id)
+
+    async def subscribe_balance_changes(self, callback: Callable[[Balance], None]):
+        self._balance_callbacks.append(callback)
+
+    def _adjust_balance(self, delta: float):
+        b = self.balances[self.active_balance_id]
+        b = b.model_copy(update={"amount": b.amount + delta})
+        self.balances[b.id] = b
+        for cb in list(self._balance_callbacks):
+            cb(b)
+
+    # -------------------------
+    # Candles
+    # -------------------------
+    async def start_candles_stream(self, active_id: int, duration: int, callback: Callable[[dict], None]):
+        self._streams.setdefault((int(active_id), int(duration)), []).append(callback)
+
+    async def get_candles(self, active_id: int, duration: int, count: int, to_time: Optional[int] = None) -> List[Candle]:
+        if to_time is None:
+            to_time = self.get_server_timestamp()
+        candles = self._history.get(None, []) + self._history.get((int(active_id), int(duration)), [])
+        candles = [c for c in candles if c.to_time <= to_time]
+        return candles[-count:]
+
+    def _on_tick(self, data: dict):
+        key = (int(data.get("active_id", 0)), int(data.get("size", 0)))
+        self._last_price[key[0]] = data.get("close")
+        cur = self._current.get(key)
+        if cur is not None and data.get("from", 0) > cur.get("from", 0):
+            # candle anterior fechou
+            self._history.setdefault(key, []).append(Candle(
+                id=cur.get("id") or next(self._candle_ids),
+                **{"from": cur.get("from"), "to": cur.get("to")},
+                open=cur.get("open"), close=cur.get("close"),
+                min=cur.get("min"), max=cur.get("max"),
+                volume=cur.get("volume", 0)
+            ))
+            self.candles_closed += 1
+        self._current[key] = data
+
+        for cb in self._streams.get(key, ()):
+            if asyncio.iscoroutinefunction(cb):
+                asyncio.create_task(cb(data))
+            else:
+                cb(data)
+
+    # -------------------------
+    # Blitz
+    # -------------------------
+    async def buy_blitz(self, active_id: int, direction: str, amount: float, duration: int = 30) -> dict:
+        if not self.active_balance_id:
+            raise ValueError("Saldo necessario")
+        direction = direction.lower()
+        price = self._last_price.get(int(active_id))
+        if price is None:
+            return {"status": "error", "result": "timeout", "pnl": 0}
+        amount = float(amount)
+        self._adjust_balance(-amount)
+        future = asyncio.get_running_loop().create_future()
+        order = _SimOrder(int(active_id), direction, amount, price, self.get_server_timestamp() + duration, future)
+        heapq.heappush(self._orders, (order.expired, next(self._seq), order))
+        self.orders += 1
+        return await future
+
+    def _settle(self, order: _SimOrder):
+        close = self._last_price.get(order.active_id, order.open_price)
+        if close == order.open_price:
+            res_type, profit = "equal", 0.0
+        elif (close > order.open_price) == (order.direction == "call"):
+            res_type, profit = "win", round(order.amount * self.payout, 2)
+        else:
+            res_type, profit = "loose", -order.amount
+        # devolve stake + lucro (win) ou só stake (equal)
+        if res_type != "loose":
+            self._adjust_balance(order.amount + profit)
+        if not order.future.done():
+            order.future.set_result({
+                "status": "completed",
+                "result": res_type,
+                "profit": profit,
+                "pnl": profit
+            })
+
+    # -------------------------
+    # Replay
+    # -------------------------
+    async def replay(self) -> dict:
+        """Reproduz todos os ticks; retorna contadores e velocidade da simulação."""
+        started = time.perf_counter()
+        for data in self.ticks:
+            t = tick_time(data)
+            # liquida ordens que expiraram antes deste tick (preço vigente no vencimento)
+            while self._orders and self._orders[0][0] < t:
+                self.now = max(self.now, float(self._orders[0][0]))
+                self._settle(heapq.heappop(self._orders)[2])
+            self.now = max(self.now, t)
+            self._on_tick(data)
+            self.ticks_replayed += 1
+            # deixa as tasks do bot (tick/try_entry/buy_blitz) rodarem até o próximo await
+            await asyncio.sleep(0)
+        while self._orders:
+            self.now = max(self.now, float(self._orders[0][0]))
+            self._settle(heapq.heappop(self._orders)[2])
+        await asyncio.sleep(0)
+        elapsed = time.perf_counter() - started
+        return {
+            "ticks": self.ticks_replayed,
+            "candles": self.candles_closed,
+            "orders": self.orders,
+            "elapsed": elapsed,
+            "candles_per_sec": self.candles_closed / elapsed if elapsed > 0 else 0.0
+        }
+
+
+async def run_simulation(bot_factory: Callable[[SimulatedIQOption], object], ticks: Iterable[dict],
+                         history: Optional[List[Candle]] = None, initial_history: int = 1000, **sim_kwargs) -> dict:
+    """
+    Cria o simulador, instancia o bot real via bot_factory(sim), faz o warm-up com
+    o histórico e reproduz os ticks. Retorna o summary() do bot + métricas do replay.
+    """
+    sim = SimulatedIQOption(ticks, history=history, **sim_kwargs)
+    bot = bot_factory(sim)
+    await bot.start(initial_history=initial_history)
+    stats = await sim.replay()
+    result = dict(bot.summary())
+    result["sim"] = stats
+    result["final_balance"] = sim.get_balance().amount
+    return result
+
+
+# Uso:
+# from bot_pro import MomentumProBot
+# ticks = load_ticks("ticks_76_60.jsonl")
+# ou, a partir do TickRecorder: ticks = TickReader("ticks").read(76, 60, start, end)
+# res = asyncio.run(run_simulation(lambda iq: MomentumProBot(iq, 76, 60), ticks, history=candles))
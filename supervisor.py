@@ -0,0 +1,281 @@
+# supervisor.py
+import asyncio
+import bisect
+import hashlib
+import multiprocessing as mp
+import os
+import queue
+import time
+from getpass import getpass
+from typing import Dict, List, Optional
+
+from myiq.core.journal import TradeStats, EV_RESULT
+
+ASSETS = [76, 1, 2, 3, 4, 5]   # ativos distribuídos entre os workers
+TIMEFRAME = 60
+WORKERS = os.cpu_count() or 2
+REPORT_EVERY = 30.0            # segundos entre resumos agregados
+RISK_STATE_DIR = "risk_state"  # estado de risco persistido, um arquivo por worker
+MAX_DAILY_LOSS = 50.0          # perda agregada do dia (UTC, moeda da conta) que pausa todos os workers
+
+
+class HashRing:
+    """Hash consistente: ao remover um worker só os ativos dele mudam de dono."""
+
+    def __init__(self, nodes: Optional[List[int]] = None, replicas: int = 64):
+        self.replicas = replicas
+        self._keys: List[int] = []
+        self._nodes: Dict[int, int] = {}
+        for n in nodes or []:
+            self.add(n)
+
+    @staticmethod
+    def _hash(value: str) -> int:
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+    def add(self, node: int):
+        for r in range(self.replicas):
+            h = self._hash(f"{node}:{r}")
+            self._nodes[h] = node
+            bisect.insort(self._keys, h)
+
+    def remove(self, node: int):
+        for r in range(self.replicas):
+            h = self._hash(f"{node}:{r}")
+            if self._nodes.pop(h, None) is not None:
+                self._keys.remove(h)
+
+    def node_for(self, key) -> Optional[int]:
+        if not self._keys:
+            return None
+        i = bisect.bisect(self._keys, self._hash(str(key))) % len(self._keys)
+        return self._nodes[self._keys[i]]
+
+    def assign(self, keys) -> Dict[int, List]:
+        out: Dict[int, List] = {}
+        for k in keys:
+            out.setdefault(self.node_for(k), []).append(k)
+        return out
+
+
+class QueueJournal:
+    """Journal que encaminha os eventos do bot ao supervisor pela fila de IPC."""
+
+    def __init__(self, worker_id: int, events: "mp.Queue"):
+        self.worker_id = worker_id
+        self.events = events
+        self.stats = TradeStats()
+
+    def record(self, kind: str, **fields):
+        if kind == EV_RESULT:
+            self.stats.add(float(fields.get("pnl", 0) or 0))
+        fields["ts"] = time.time()
+        self.events.put((self.worker_id, kind, fields))
+
+
+# -------------------------
+# Worker
+# -------------------------
+async def _worker(worker_id: int, email: str, password: str, assets: List[int], commands: "mp.Queue", events: "mp.Queue"):
+    # imports pesados (sklearn) só no processo filho
+    from bot_pro import MomentumProBot, RiskManager
+    from inference import BatchInferenceEngine
+    from myiq import IQOption
+
+    iq = IQOption(email, password)
+    await iq.start()
+    if not iq.connected:
+        events.put((worker_id, "error", {"error": "falha ao conectar"}))
+        return
+
+    balances = list(iq.balances.values()) or await iq.get_balances()
+    balance = next((b for b in balances if b.type == 4 and b.amount > 0), None) or balances[0]
+    await iq.change_balance(balance.id)
+
+    journal = QueueJournal(worker_id, events)
+    # risco local compartilhado pelos bots do worker; o supervisor pode pausar todos
+    os.makedirs(RISK_STATE_DIR, exist_ok=True)
+    risk = RiskManager(percent_risk_per_trade=0.01, max_daily_loss_percent=0.05,
+                       state_path=os.path.join(RISK_STATE_DIR, f"worker_{worker_id}.json"))
+    # ticks dos vários ativos do worker são pontuados juntos
+    inference = BatchInferenceEngine()
+    bots = {}
+
+    async def add_assets(ids):
+        for active_id in ids:
+            if active_id in bots:
+                continue
+            bot = MomentumProBot(iq, active_id, TIMEFRAME, min_confidence=0.72, vol_threshold=0.0001,
+                                 journal=journal, risk=risk, inference=inference)
+            await bot.start(initial_history=200)
+            bots[active_id] = bot
+            events.put((worker_id, "assigned", {"active": active_id}))
+
+    await add_assets(assets)
+    events.put((worker_id, "ready", {"assets": list(bots)}))
+
+    loop = asyncio.get_running_loop()
+    try:
+        while iq.connected:
+            try:
+                cmd, arg = await loop.run_in_executor(None, commands.get, True, 1.0)
+            except queue.Empty:
+                events.put((worker_id, "heartbeat", {"stats": journal.stats.as_dict()}))
+                continue
+            if cmd == "add":
+                await add_assets(arg)
+            elif cmd == "pause":
+                risk.halted = bool(arg)
+            elif cmd == "stop":
+                break
+    finally:
+        await iq.close()
+        risk.close()
+
+
+def worker_main(worker_id: int, email: str, password: str, assets: List[int], commands: "mp.Queue", events: "mp.Queue"):
+    try:
+        asyncio.run(_worker(worker_id, email, password, assets, commands, events))
+    except KeyboardInterrupt:
+        pass
+
+
+# -------------------------
+# Supervisor
+# -------------------------
+class Supervisor:
+    def __init__(self, email: str, password: str, assets: List[int], workers: int = WORKERS,
+                 max_daily_loss: Optional[float] = None):
+        """
+        max_daily_loss: perda agregada do dia UTC (todos os workers/ativos) que pausa todos
+            os workers; a pausa é retirada na virada do dia
+        """
+        self.email = email
+        self.password = password
+        self.assets = list(assets)
+        self.n_workers = max(1, min(workers, len(self.assets)))
+        self.max_daily_loss = max_daily_loss
+        self.ctx = mp.get_context("spawn")
+        self.events = self.ctx.Queue()
+        self.ring = HashRing(list(range(self.n_workers)))
+        self.procs: Dict[int, mp.Process] = {}
+        self.commands: Dict[int, "mp.Queue"] = {}
+        self.owner: Dict[int, int] = {}           # ativo -> worker
+
+        # agregados centrais
+        self.stats = TradeStats()
+        self.pnl_by_asset: Dict[int, float] = {}
+        self.pnl_by_worker: Dict[int, float] = {}
+        self.daily_pnl = 0.0
+        self.day = self._day(time.time())
+        self.paused = False
+
+    @staticmethod
+    def _day(ts: float) -> int:
+        return int(ts // 86400)
+
+    def _roll_day(self, now: float):
+        # virada de dia (UTC): zera o agregado diário e retira a pausa por perda
+        day = self._day(now)
+        if day == self.day:
+            return
+        self.day = day
+        self.daily_pnl = 0.0
+        if self.paused:
+            self.paused = False
+            print("[sup] Novo dia — retomando todos os workers.")
+            self.broadcast("pause", False)
+
+    def start(self):
+        # todo nó do anel ganha processo, mesmo sem ativos: no rebalanceamento o anel
+        # pode mandar ativos para qualquer nó vivo
+        assignment = self.ring.assign(self.assets)
+        for wid in range(self.n_workers):
+            assets = assignment.get(wid, [])
+            self.commands[wid] = self.ctx.Queue()
+            proc = self.ctx.Process(target=worker_main, name=f"bot-worker-{wid}",
+                                    args=(wid, self.email, self.password, assets, self.commands[wid], self.events),
+                                    daemon=True)
+            proc.start()
+            self.procs[wid] = proc
+            for a in assets:
+                self.owner[a] = wid
+            print(f"[sup] worker {wid} (pid {proc.pid}) -> ativos {assets}")
+
+    def broadcast(self, cmd: str, arg=None):
+        for wid in self.procs:
+            self.commands[wid].put((cmd, arg))
+
+    def _on_event(self, wid: int, kind: str, fields: dict):
+        if kind == EV_RESULT:
+            pnl = float(fields.get("pnl", 0) or 0)
+            active = fields.get("active")
+            self._roll_day(time.time())
+            self.stats.add(pnl)
+            self.daily_pnl += pnl
+            self.pnl_by_asset[active] = self.pnl_by_asset.get(active, 0.0) + pnl
+            self.pnl_by_worker[wid] = self.pnl_by_worker.get(wid, 0.0) + pnl
+            if self.max_daily_loss is not None and not self.paused and -self.daily_pnl >= self.max_daily_loss:
+                self.paused = True
+                print(f"[sup] Perda agregada do dia {self.daily_pnl:.2f} — pausando todos os workers.")
+                self.broadcast("pause", True)
+        elif kind == "error":
+            print(f"[sup] worker {wid} erro: {fields.get('error')}")
+
+    def _check_workers(self):
+        for wid, proc in list(self.procs.items()):
+            if proc.is_alive():
+                continue
+            # worker caiu: tira do anel e redistribui só os ativos dele
+            print(f"[sup] worker {wid} caiu (exit {proc.exitcode}); rebalanceando.")
+            del self.procs[wid]
+            self.ring.remove(wid)
+            orphans = [a for a, w in self.owner.items() if w == wid]
+            if not self.procs:
+                print("[sup] Nenhum worker restante.")
+                return
+            for new_wid, assets in self.ring.assign(orphans).items():
+                self.commands[new_wid].put(("add", assets))
+                for a in assets:
+                    self.owner[a] = new_wid
+                print(f"[sup] ativos {assets} -> worker {new_wid}")
+
+    def report(self):
+        s = self.stats.as_dict()
+        print(f"[sup] trades={s['trades']} winrate={s['winrate']:.2%} pnl={s['total_pnl']:.2f} "
+              f"pnl hoje={self.daily_pnl:.2f}{' (pausado)' if self.paused else ''} "
+              f"por ativo={self.pnl_by_asset} workers vivos={list(self.procs)}")
+
+    def run(self):
+        self.start()
+        last_report = time.monotonic()
+        try:
+            while self.procs:
+                try:
+                    wid, kind, fields = self.events.get(timeout=1.0)
+                    self._on_event(wid, kind, fields)
+                except queue.Empty:
+                    pass
+                self._check_workers()
+                self._roll_day(time.time())
+                if time.monotonic() - last_report >= REPORT_EVERY:
+                    self.report()
+                    last_report = time.monotonic()
+        except KeyboardInterrupt:
+            print("\n🛑 Supervisor finalizado manualmente.")
+        finally:
+            self.broadcast("stop")
+            for proc in self.procs.values():
+                proc.join(5)
+            self.report()
+
+
+def main():
+    print("\n=== IQ OPTION LOGIN (supervisor) ===")
+    email = input("Email: ")
+    password = getpass("Senha: ")
+    Supervisor(email, password, ASSETS, workers=WORKERS, max_daily_loss=MAX_DAILY_LOSS).run()
+
+
+if __name__ == "__main__":
+    main()